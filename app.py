@@ -4,7 +4,6 @@ import sys
 import pandas as pd
 import random
 import streamlit.components.v1 as components
-import base64
 from streamlit_mic_recorder import mic_recorder
 
 # Adiciona o diretório atual ao sys.path para que os módulos possam ser importados
@@ -34,19 +33,17 @@ from chatbot_logic import (
     transcrever_audio
 )
 
+# Importa o cache compartilhado entre as sessões
+from utils.cache_streamlit import obter_recursos_dataset
+from utils.aquecimento import iniciar_aquecimento
+from utils.assets import estilo_css
+
 # Importa as funções de banco de dados
 from database_logic import init_db, save_conversation, get_all_conversations_as_df
 
 # Importa as páginas
 from pages import home_page, chat_page, insights_page, trends_page, analytics_page
 
-# --- Função para codificar imagem ---
-def get_image_as_base64(path):
-    if not os.path.exists(path):
-        return None
-    with open(path, "rb") as img_file:
-        return base64.b64encode(img_file.read()).decode()
-
 # --- Configuração da página Streamlit ---
 st.set_page_config(
     page_title="Observatório Aeroportuário - IBI",
@@ -61,12 +58,18 @@ init_db()
 # Caminho para a pasta de arquivos Parquet
 PASTA_ARQUIVOS_PARQUET = 'dados_aeroportuarios_parquet'
 
+# Prepara o banco, a view e o manifesto uma única vez por versão do dataset, para todas as sessões
+obter_recursos_dataset(PASTA_ARQUIVOS_PARQUET)
+
 # --- Obter o Último Ano Disponível ---
 ultimo_ano = obter_ultimo_ano_disponivel(PASTA_ARQUIVOS_PARQUET)
 if ultimo_ano is None:
     st.error("Não foi possível determinar o último ano disponível nos dados. Verifique a pasta de arquivos Parquet.")
     st.stop()
 
+# Aquece em segundo plano o cache das consultas das páginas (uma vez por versão do dataset)
+iniciar_aquecimento(PASTA_ARQUIVOS_PARQUET, ultimo_ano)
+
 # --- Logo e CSS Personalizado ---
 APP_DIR = os.path.dirname(os.path.abspath(__file__))
 LOGO_PATH = os.path.join(APP_DIR, "images", "logo.svg")
@@ -76,138 +79,8 @@ INSIGHTS_ICON_PATH = os.path.join(APP_DIR, "images", "insights_page.gif")
 ANALYTICS_ICON_PATH = os.path.join(APP_DIR, "images", "analytics_page.gif")
 TRENDS_ICON_PATH = os.path.join(APP_DIR, "images", "trends_page.gif")
 
-st.markdown(
-    """
-    <style>
-    /* Design principal da página */
-    .stApp {
-        padding-bottom: 2rem;
-    }
-
-    /* Sidebar styling */
-    .css-1d391kg {
-        background-color: #f8f9fa;
-    }
-
-    /* Main content area */
-    .main .block-container {
-        padding-top: 2rem;
-        max-width: 1200px;
-    }
-
-    /* Navigation styling */
-    .nav-item {
-        padding: 0.5rem 1rem;
-        margin: 0.2rem 0;
-        border-radius: 0.5rem;
-        cursor: pointer;
-        transition: background-color 0.3s;
-    }
-
-    .nav-item:hover {
-        background-color: #e9ecef;
-    }
-
-    .nav-item.active {
-        background-color: #007bff;
-        color: white;
-    }
-
-    /* Responsive design */
-    @media (max-width: 768px) {
-        .main .block-container {
-            padding-top: 1rem;
-        }
-    }
-
-    /* Title styling */
-    h1, h2, h3 {
-        color: #595a5c !important;
-    }
-
-    /* Primary button styling */
-    .stButton > button[data-testid="baseButton-primary"] {
-        background-color: #017fff !important;
-        border-color: #017fff !important;
-        color: white !important;
-        justify-content: center;
-    }
-
-    .stButton > button[data-testid="baseButton-primary"]:hover {
-        background-color: #017fff !important;
-        border-color: #017fff !important;
-    }
-
-    /* Hide streamlit default elements */
-    .stApp > footer {
-        display: none;
-    }
-
-    #MainMenu {
-        visibility: hidden;
-    }
-
-    .stDeployButton {
-        display: none;
-    }
-
-    div[data-testid="stFullScreenFrame"] > div:first-child { margin: 0 auto; display: table; width: 100%; max-width: 700px; }
-    .stImage { width: 100%; display: flex; justify-content: center; align-items: center; margin-top: 1rem; margin-bottom: 1rem; }
-    .stImage img { width: 100%; max-width: 500px; height: auto; display: block; }
-    .stButton > button { text-align: left; justify-content: flex-start; width: 100%; }
-
-    .st-key-audio_recorder {
-        position: fixed;
-        z-index: 999;
-        width: 40px;
-        bottom: 50px;
-        margin-left: 100px;
-    }
-    /* condition for screen size minimum of 736px */
-    @media (max-width:736px) {
-        .st-key-audio_recorder {
-            position: fixed;
-            z-index: 999;
-            right: 10px;
-            width: 40px;
-            bottom: 50px;
-        }
-    }
-
-    /* Primary button styling */
-    .stButton > button[data-testid="stBaseButton-primary"] {
-        background-color: #007bff !important;
-        border-color: #007bff !important;
-        color: white !important;
-        justify-content: center;
-    }
-    .stButton > button[data-testid="stBaseButton-primary"]:hover {
-        background-color: #0056b3 !important;
-        border-color: #0056b3 !important;
-    }
-    .stButton > button[data-testid="stBaseButton-secondary"]:hover {
-        border-color: #0056b3 !important;
-        color: #0056b3 !important;
-    }
-
-    /* Classe personalizada para o botão "Ver mais" */
-    .st-key-show_more button {
-        width: auto;
-        border-radius: 50%;
-    }
-    .st-key-show_more .stButton {
-        text-align: center;
-    }
-    .st-key-chat_input {
-        padding-right: 3em;
-    }
-    div[data-testid="stSidebarNav"] {
-        display: none;
-    }
-    </style>
-    """,
-    unsafe_allow_html=True
-)
+# CSS carregado do arquivo uma única vez por processo
+st.markdown(estilo_css(), unsafe_allow_html=True)
 
 # --- Barra Lateral com Navegação ---
 with st.sidebar:
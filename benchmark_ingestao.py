@@ -0,0 +1,164 @@
+import argparse
+import datetime
+import json
+import os
+import platform
+import shutil
+import sys
+import time
+try:
+    import resource
+except ImportError: # Indisponível no Windows: o pico de memória não é medido
+    resource = None
+from converter_json_para_parquet import TAMANHO_LOTE_PADRAO, converter_json_para_parquet
+from queries.matriz_od import carregar_matriz_od
+
+# --- Documentação do Código ---
+# Este script mede uma ingestão completa (não incremental) de uma pasta de JSON: o tempo de cada
+# etapa da conversão, a vazão em linhas/s, o pico de memória e a taxa de compressão, e grava tudo
+# em um relatório JSON. Relatórios de execuções diferentes (outra máquina, outros parâmetros ou
+# outra versão do conversor) podem ser comparados com --comparar.
+
+# Etapas medidas em cada arquivo convertido (ver _converter_arquivo), na ordem em que ocorrem
+ETAPAS_ARQUIVO = ['leitura_json', 'tipos', 'gravacao', 'ordenacao', 'agregados']
+
+# Métricas exibidas na comparação entre relatórios
+METRICAS_COMPARACAO = ['segundos', 'linhas_por_segundo', 'megabytes_por_segundo', 'taxa_compressao']
+
+def _pico_memoria_mb():
+    """Pico de memória residente (RSS) deste processo e do maior subprocesso, em MB"""
+    if resource is None: return None
+    fator = 1024 * 1024 if sys.platform == 'darwin' else 1024 # ru_maxrss: bytes no macOS, KB no Linux
+    return {
+        "processo": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / fator,
+        "subprocessos": resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss / fator,
+    }
+
+def _tamanho_pasta_mb(pasta):
+    """Tamanho total dos arquivos da pasta (dados, agregados e índices), em MB"""
+    return sum(os.path.getsize(os.path.join(raiz, nome)) for raiz, _, nomes in os.walk(pasta) for nome in nomes) / (1024*1024)
+
+def medir_ingestao(pasta_entrada, pasta_saida, matriz_od=False, **opcoes):
+    """
+    Converte a pasta de JSON em uma pasta de saída vazia e mede cada etapa.
+
+    Args:
+        pasta_entrada (str): A pasta com os arquivos JSON.
+        pasta_saida (str): A pasta Parquet de destino; deve estar vazia ou não existir.
+        matriz_od (bool): Se True, mede também a montagem da matriz origem-destino.
+        **opcoes: Parâmetros repassados a converter_json_para_parquet (particionar, modo_streaming...).
+
+    Returns:
+        dict: O relatório da execução, ou None se a pasta de saída não estiver vazia.
+    """
+    if os.path.isdir(pasta_saida) and os.listdir(pasta_saida):
+        print(f"Erro: A pasta de saída '{pasta_saida}' não está vazia (use --sobrescrever).")
+        return None
+    inicio = time.perf_counter()
+    resultado = converter_json_para_parquet(pasta_entrada, pasta_saida, incremental=False, **opcoes)
+    if resultado is None: return None
+    etapas = dict(resultado["etapas"])
+    if matriz_od:
+        inicio_matriz = time.perf_counter()
+        carregar_matriz_od(pasta_saida)
+        etapas["matriz_od"] = time.perf_counter() - inicio_matriz
+    segundos = time.perf_counter() - inicio
+    pico_memoria = _pico_memoria_mb() # Antes de platform.platform(), que cria subprocessos
+
+    arquivos = resultado["arquivos"]
+    convertidos = [arquivo for arquivo in arquivos if arquivo["status"] == "ok"]
+    linhas = sum(arquivo["linhas"] for arquivo in convertidos)
+    megabytes_json = sum(arquivo["megabytes"] for arquivo in convertidos)
+    megabytes_parquet = sum(arquivo["megabytes_saida"] for arquivo in convertidos)
+    segundos_conversao = max(etapas.get("conversao", segundos), 1e-9)
+    return {
+        "executado_em": datetime.datetime.now().isoformat(timespec="seconds"),
+        "parametros": {"pasta_entrada": pasta_entrada, "pasta_saida": pasta_saida, "matriz_od": matriz_od, **opcoes},
+        "maquina": {"plataforma": platform.platform(), "python": platform.python_version(), "nucleos": os.cpu_count()},
+        "segundos": segundos,
+        "linhas": linhas,
+        "linhas_por_segundo": linhas / segundos_conversao,
+        "megabytes_json": megabytes_json,
+        "megabytes_parquet": megabytes_parquet,
+        "megabytes_por_segundo": megabytes_json / segundos_conversao,
+        "megabytes_pasta": _tamanho_pasta_mb(pasta_saida),
+        "taxa_compressao": megabytes_json / megabytes_parquet if megabytes_parquet else None,
+        "pico_memoria_mb": pico_memoria,
+        # Soma das etapas de todos os arquivos: com processos em paralelo, pode passar do tempo de conversão
+        "etapas_arquivos": {etapa: sum(arquivo["etapas"].get(etapa, 0.0) for arquivo in arquivos) for etapa in ETAPAS_ARQUIVO},
+        "etapas": etapas,
+        "arquivos": arquivos,
+        "erros": [arquivo["arquivo"] for arquivo in arquivos if arquivo["status"] == "erro"],
+    }
+
+def imprimir_relatorio(relatorio):
+    """Imprime o tempo de cada etapa e as métricas de vazão, compressão e memória"""
+    print(f"\n{'=' * 60}\nIngestão de {relatorio['linhas']:,} linhas ({relatorio['megabytes_json']:.1f} MB de JSON) em {relatorio['segundos']:.1f}s")
+    total_arquivos = max(sum(relatorio["etapas_arquivos"].values()), 1e-9)
+    print("\nEtapas por arquivo (soma de todos os arquivos):")
+    for etapa, segundos in relatorio["etapas_arquivos"].items():
+        print(f"  {etapa:<24}{segundos:>9.2f}s {100 * segundos / total_arquivos:>6.1f}%")
+    print("\nEtapas da pasta:")
+    for etapa, segundos in relatorio["etapas"].items():
+        print(f"  {etapa:<24}{segundos:>9.2f}s")
+    print(f"\nVazão: {relatorio['linhas_por_segundo']:,.0f} linhas/s, {relatorio['megabytes_por_segundo']:.1f} MB/s de JSON")
+    if relatorio["taxa_compressao"]:
+        print(f"Compressão: {relatorio['megabytes_json']:.1f} MB de JSON -> {relatorio['megabytes_parquet']:.1f} MB de Parquet "
+              f"({relatorio['taxa_compressao']:.1f}x; {relatorio['megabytes_pasta']:.1f} MB com agregados e índices)")
+    if relatorio["pico_memoria_mb"]:
+        pico = relatorio["pico_memoria_mb"]
+        print(f"Pico de memória (RSS): {pico['processo']:.0f} MB no processo principal, {pico['subprocessos']:.0f} MB no maior subprocesso")
+    if relatorio["erros"]:
+        print(f"Arquivos com erro: {', '.join(relatorio['erros'])}")
+
+def comparar_relatorios(anterior, atual):
+    """Imprime a variação das métricas e das etapas entre dois relatórios"""
+    print(f"\nComparação com a execução de {anterior['executado_em']}:")
+    linhas = [(metrica, anterior.get(metrica), atual.get(metrica)) for metrica in METRICAS_COMPARACAO]
+    linhas += [(etapa, anterior["etapas_arquivos"].get(etapa), atual["etapas_arquivos"].get(etapa)) for etapa in ETAPAS_ARQUIVO]
+    linhas += [(etapa, anterior["etapas"].get(etapa), atual["etapas"].get(etapa)) for etapa in atual["etapas"]]
+    if anterior.get("pico_memoria_mb") and atual.get("pico_memoria_mb"):
+        linhas += [(f"memoria_{chave}_mb", anterior["pico_memoria_mb"][chave], atual["pico_memoria_mb"][chave]) for chave in atual["pico_memoria_mb"]]
+    for nome, valor_anterior, valor_atual in linhas:
+        if valor_anterior is None or valor_atual is None: continue
+        variacao = f"{100 * (valor_atual - valor_anterior) / valor_anterior:+.1f}%" if valor_anterior else "-"
+        print(f"  {nome:<28}{valor_anterior:>14,.2f} -> {valor_atual:>14,.2f}  {variacao}")
+
+# --- Exemplo de Uso ---
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Mede a ingestão de uma pasta de JSON e grava um relatório de desempenho.")
+    parser.add_argument("entrada", help="Pasta com os arquivos JSON")
+    parser.add_argument("saida", help="Pasta Parquet de destino (vazia)")
+    parser.add_argument("--particionar", action="store_true", help="Grava no layout Hive ANO=/MES=")
+    parser.add_argument("--streaming", action="store_true", help="Lê o JSON em lotes, com memória constante")
+    parser.add_argument("--tamanho-lote", type=int, default=TAMANHO_LOTE_PADRAO, help="Registros por lote no modo streaming")
+    parser.add_argument("--processos", type=int, default=1, help="Arquivos convertidos em paralelo (0 = um por núcleo)")
+    parser.add_argument("--limite-memoria", type=float, help="Memória (MB) que as conversões simultâneas podem ocupar")
+    parser.add_argument("--ordenar", action="store_true", help="Grava as linhas ordenadas, com row groups fixos e bloom filters")
+    parser.add_argument("--sem-agregados", action="store_true", help="Não gera as tabelas agregadas")
+    parser.add_argument("--banco-nativo", action="store_true", help="Carrega também o banco DuckDB nativo")
+    parser.add_argument("--matriz-od", action="store_true", help="Mede também a montagem da matriz origem-destino")
+    parser.add_argument("--sobrescrever", action="store_true", help="Apaga a pasta de saída antes de começar")
+    parser.add_argument("--relatorio", help="Arquivo JSON do relatório (padrão: relatorio_ingestao_<data>.json)")
+    parser.add_argument("--comparar", help="Relatório de uma execução anterior para comparação")
+    args = parser.parse_args()
+
+    if args.sobrescrever and os.path.isdir(args.saida):
+        shutil.rmtree(args.saida)
+    relatorio = medir_ingestao(
+        args.entrada, args.saida, matriz_od=args.matriz_od,
+        particionar=args.particionar, gerar_agregados=not args.sem_agregados, modo_streaming=args.streaming,
+        tamanho_lote=args.tamanho_lote, processos=args.processos or None, limite_memoria_mb=args.limite_memoria,
+        ordenar=args.ordenar, banco_nativo=args.banco_nativo,
+    )
+    if relatorio is None:
+        sys.exit(1)
+    imprimir_relatorio(relatorio)
+
+    caminho_relatorio = args.relatorio or f"relatorio_ingestao_{datetime.datetime.now():%Y%m%d_%H%M%S}.json"
+    with open(caminho_relatorio, "w", encoding="utf-8") as f:
+        json.dump(relatorio, f, ensure_ascii=False, indent=1)
+    print(f"\nRelatório gravado em '{caminho_relatorio}'.")
+    if args.comparar:
+        with open(args.comparar, "r", encoding="utf-8") as f:
+            comparar_relatorios(json.load(f), relatorio)
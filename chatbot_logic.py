@@ -15,5 +15,5 @@ from queries.rankings import (
     obter_top_10_aeroportos,
     calcular_market_share
 )
-from graphics.charts import gerar_grafico_market_share, gerar_grafico_historico
+from graphics.charts import gerar_grafico_market_share, gerar_grafico_historico, gerar_figura_market_share, gerar_figura_historico, FORMATO_GRAFICOS_CHAT
 from llm_services.openai_service import transcrever_audio, reescrever_resposta_com_llm, parse_pergunta_com_llm
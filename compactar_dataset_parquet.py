@@ -0,0 +1,221 @@
+import argparse
+import os
+import time
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.parquet as pq
+from queries.catalog import (ARQUIVO_BANCO_NATIVO, PREFIXO_SEGMENTO, listar_arquivos_parquet, ler_segmentos,
+                             gravar_segmentos, caminho_relativo)
+from queries.banco_nativo import carregar_banco_nativo
+from queries.agregados import AGREGADOS, construir_agregados
+from queries.manifest import atualizar_manifesto
+from converter_json_para_parquet import (ESQUEMA_PARQUET, COLUNAS_PARTICAO, _tratar_tipos, _calcular_atraso, _tabela_no_esquema,
+                                         _gravar_tabela, _carregar_manifesto_ingestao, _gravar_manifesto_ingestao)
+
+# --- Documentação do Código ---
+# Este script compacta a pasta Parquet: os arquivos mensais de cada ano são regravados em um único
+# segmento (pasta_parquet/ANO=2024/segmento_2024_<geração>.parquet), ordenado e com row groups de
+# tamanho fixo. A troca é feita gravando o manifesto '_segmentos.json' de uma vez; os arquivos
+# substituídos continuam no disco (invisíveis às consultas) e só são apagados após um período de
+# carência, para que consultas em andamento nos aplicativos abertos terminem normalmente.
+#
+# Reconverter um mês já compactado grava de novo o arquivo mensal, que volta a ser lido junto com
+# o segmento do ano: nesse caso, compacte o ano outra vez (o mês reconvertido prevalece).
+
+# Tempo mínimo, em segundos, entre a troca do manifesto e a remoção dos arquivos substituídos
+CARENCIA_REMOCAO = 300
+
+def _ler_no_esquema(caminho, pasta_parquet):
+    """Lê um arquivo de dados no ESQUEMA_PARQUET, convertendo arquivos do esquema antigo e
+    recuperando as colunas de partição (ANO=/MES=) do caminho"""
+    tabela = pq.read_table(caminho)
+    if 'QT_PAX_TOTAL' not in tabela.column_names:
+        tabela = _tabela_no_esquema(_tratar_tipos(tabela.to_pandas()))
+    elif 'MIN_ATRASO' not in tabela.column_names: # Esquema 2: horários já em minutos, sem o atraso
+        atraso = _calcular_atraso(tabela.select(['DT_CALCO', 'DT_PREVISTO', 'MIN_CALCO', 'MIN_PREVISTO']).to_pandas())
+        tabela = tabela.append_column('MIN_ATRASO', pa.array(atraso, type=pa.int32(), from_pandas=True))
+    pastas = os.path.relpath(os.path.dirname(caminho), pasta_parquet).split(os.sep)
+    for chave, valor in (pasta.split('=', 1) for pasta in pastas if '=' in pasta):
+        if chave in COLUNAS_PARTICAO and chave not in tabela.column_names:
+            tabela = tabela.append_column(chave, pa.array([int(valor)] * len(tabela)))
+    return tabela.select(ESQUEMA_PARQUET.names).cast(ESQUEMA_PARQUET)
+
+def _anos_do_arquivo(caminho, pasta_parquet):
+    """Retorna os anos presentes no arquivo: pela partição, se houver, ou pelas estatísticas do footer"""
+    pastas = os.path.relpath(os.path.dirname(caminho), pasta_parquet).split(os.sep)
+    for pasta in pastas:
+        if pasta.startswith('ANO='):
+            return {int(pasta.split('=', 1)[1])}
+    metadados = pq.ParquetFile(caminho).metadata
+    indice = metadados.schema.to_arrow_schema().get_field_index('ANO')
+    anos = set()
+    for i in range(metadados.num_row_groups):
+        estatisticas = metadados.row_group(i).column(indice).statistics
+        if estatisticas is None or not estatisticas.has_min_max: return None
+        anos.update(range(int(estatisticas.min), int(estatisticas.max) + 1))
+    return anos
+
+def _compactar_ano(pasta_parquet, ano, arquivos, geracao):
+    """
+    Grava o segmento de um ano a partir dos seus arquivos (mensais e/ou segmento anterior).
+
+    Meses presentes em arquivos mensais prevalecem sobre os mesmos meses de um segmento anterior,
+    de modo que reconverter um mês e compactar o ano de novo não duplica dados.
+
+    Returns:
+        str: O caminho relativo do segmento gravado.
+    """
+    segmentos = [caminho for caminho in arquivos if os.path.basename(caminho).startswith(PREFIXO_SEGMENTO)]
+    mensais = [_ler_no_esquema(caminho, pasta_parquet) for caminho in arquivos if caminho not in segmentos]
+    meses_mensais = pa.array(sorted({mes for tabela in mensais for mes in pc.unique(tabela['MES']).to_pylist()}), type=pa.int8())
+    anteriores = []
+    for caminho in segmentos:
+        tabela = _ler_no_esquema(caminho, pasta_parquet)
+        anteriores.append(tabela.filter(pc.invert(pc.is_in(tabela['MES'], value_set=meses_mensais))))
+    tabela = pa.concat_tables(anteriores + mensais).drop_columns(['ANO'])
+
+    pasta_ano = os.path.join(pasta_parquet, f"ANO={ano}")
+    os.makedirs(pasta_ano, exist_ok=True)
+    caminho = os.path.join(pasta_ano, f"{PREFIXO_SEGMENTO}{ano}_{geracao}.parquet")
+    _gravar_tabela(tabela, caminho + ".tmp", ordenar=True)
+    os.replace(caminho + ".tmp", caminho) # Ainda invisível: segmentos só são lidos se estiverem no manifesto
+    return caminho_relativo(caminho, pasta_parquet)
+
+def remover_obsoletos(pasta_parquet, carencia=CARENCIA_REMOCAO):
+    """
+    Apaga os arquivos substituídos por segmentos, os segmentos inativos e seus agregados,
+    se a última troca do manifesto tiver ocorrido há mais de `carencia` segundos.
+
+    Returns:
+        list: Os caminhos relativos dos arquivos de dados removidos.
+    """
+    manifesto = ler_segmentos(pasta_parquet)
+    if time.time() - manifesto.get('trocado_em', 0) < carencia:
+        return []
+    ativos = set(manifesto['segmentos'])
+    removidos = []
+    for relativo, (tamanho, modificado_em) in list(manifesto['substituidos'].items()):
+        caminho = os.path.join(pasta_parquet, relativo)
+        try:
+            info = os.stat(caminho)
+            if [info.st_size, info.st_mtime_ns] == [tamanho, modificado_em]: # Não foi regravado depois da troca
+                os.remove(caminho)
+                removidos.append(relativo)
+        except OSError:
+            pass
+        del manifesto['substituidos'][relativo]
+    for raiz, _, nomes in os.walk(pasta_parquet):
+        for nome in nomes:
+            caminho = os.path.join(raiz, nome)
+            if nome.startswith(PREFIXO_SEGMENTO) and nome.endswith('.parquet') and not os.path.basename(raiz).startswith('_') \
+                    and caminho_relativo(caminho, pasta_parquet) not in ativos:
+                os.remove(caminho)
+                removidos.append(caminho_relativo(caminho, pasta_parquet))
+    gravar_segmentos(pasta_parquet, manifesto)
+
+    # Agregados dos arquivos removidos que não correspondem mais a nenhum arquivo de dados ativo
+    nomes_ativos = {os.path.basename(caminho) for caminho in listar_arquivos_parquet(pasta_parquet)}
+    for agregado in AGREGADOS.values():
+        for relativo in removidos:
+            nome = os.path.basename(relativo)
+            caminho = os.path.join(pasta_parquet, agregado['subpasta'], nome)
+            if nome not in nomes_ativos and os.path.exists(caminho):
+                os.remove(caminho)
+    # Pastas de partição que ficaram vazias
+    for raiz, pastas, nomes in os.walk(pasta_parquet, topdown=False):
+        if raiz != pasta_parquet and '=' in os.path.basename(raiz) and not os.listdir(raiz):
+            os.rmdir(raiz)
+    return removidos
+
+def compactar_dataset(pasta_parquet, anos=None, carencia=CARENCIA_REMOCAO):
+    """
+    Compacta os arquivos de cada ano da pasta Parquet em um único segmento.
+
+    Args:
+        pasta_parquet (str): A pasta do dataset.
+        anos (list): Anos a compactar. Se None, compacta todos os anos com mais de um arquivo.
+        carencia (int): Segundos que os arquivos substituídos permanecem no disco após a troca.
+
+    Returns:
+        dict: Os segmentos gravados ({ano: caminho relativo}) e os arquivos substituídos.
+    """
+    pasta_parquet = os.path.abspath(pasta_parquet)
+    inicio = time.perf_counter()
+    removidos = remover_obsoletos(pasta_parquet, carencia)
+    if removidos:
+        print(f"Removidos {len(removidos)} arquivo(s) substituídos por uma compactação anterior.")
+
+    arquivos_por_ano = {}
+    for caminho in listar_arquivos_parquet(pasta_parquet):
+        anos_arquivo = _anos_do_arquivo(caminho, pasta_parquet)
+        if not anos_arquivo or len(anos_arquivo) != 1:
+            print(f"AVISO: {caminho_relativo(caminho, pasta_parquet)} não pertence a um único ano e não será compactado.")
+            continue
+        arquivos_por_ano.setdefault(anos_arquivo.pop(), []).append(caminho)
+
+    geracao = time.strftime("%Y%m%d%H%M%S")
+    while any(segmento.endswith(f"_{geracao}.parquet") for segmento in ler_segmentos(pasta_parquet)['segmentos']):
+        time.sleep(1) # Nunca regrava um segmento ativo
+        geracao = time.strftime("%Y%m%d%H%M%S")
+    segmentos, substituidos = {}, []
+    for ano, arquivos in sorted(arquivos_por_ano.items()):
+        if anos is not None and ano not in anos: continue
+        if len(arquivos) < 2: continue
+        tamanho_antes = sum(os.path.getsize(caminho) for caminho in arquivos)
+        try:
+            segmentos[ano] = _compactar_ano(pasta_parquet, ano, arquivos, geracao)
+        except Exception as e:
+            print(f"  Ocorreu um erro ao compactar o ano {ano}: {e}")
+            continue
+        substituidos.extend(arquivos)
+        tamanho_depois = os.path.getsize(os.path.join(pasta_parquet, segmentos[ano]))
+        print(f"  -> {ano}: {len(arquivos)} arquivo(s), {tamanho_antes / (1024*1024):.2f} MB -> {segmentos[ano]} ({tamanho_depois / (1024*1024):.2f} MB)")
+    if not segmentos:
+        print("Nada a compactar.")
+        return {"segmentos": {}, "substituidos": []}
+
+    # Troca atômica: um único os.replace ativa os segmentos e esconde os arquivos substituídos
+    manifesto = ler_segmentos(pasta_parquet)
+    relativos_substituidos = {caminho_relativo(caminho, pasta_parquet) for caminho in substituidos}
+    manifesto['segmentos'] = sorted((set(manifesto['segmentos']) - relativos_substituidos) | set(segmentos.values()))
+    for caminho in substituidos:
+        if not os.path.basename(caminho).startswith(PREFIXO_SEGMENTO): # Segmentos inativos já são ignorados
+            info = os.stat(caminho)
+            manifesto['substituidos'][caminho_relativo(caminho, pasta_parquet)] = [info.st_size, info.st_mtime_ns]
+    manifesto['trocado_em'] = time.time()
+    gravar_segmentos(pasta_parquet, manifesto)
+
+    # A conversão incremental passa a considerar os meses compactados como já convertidos
+    manifesto_ingestao = _carregar_manifesto_ingestao(pasta_parquet)
+    if manifesto_ingestao:
+        segmento_por_arquivo = {}
+        for caminho in substituidos:
+            ano = _anos_do_arquivo(caminho, pasta_parquet)
+            segmento_por_arquivo[caminho_relativo(caminho, pasta_parquet)] = segmentos[next(iter(ano))] if ano else None
+        for entrada in manifesto_ingestao.values():
+            novas_saidas = [segmento_por_arquivo.get(saida.replace(os.sep, '/'), saida) for saida in entrada.get('saidas', [])]
+            entrada['saidas'] = sorted(set(novas_saidas))
+        _gravar_manifesto_ingestao(pasta_parquet, manifesto_ingestao)
+
+    construir_agregados(pasta_parquet, [os.path.basename(relativo) for relativo in segmentos.values()], forcar=True)
+    atualizar_manifesto(pasta_parquet)
+    if os.path.exists(os.path.join(pasta_parquet, ARQUIVO_BANCO_NATIVO)):
+        carregar_banco_nativo(pasta_parquet) # O banco nativo registra a versão (arquivos) do dataset
+    print(f"\nCompactação concluída em {time.perf_counter() - inicio:.1f}s: {len(substituidos)} arquivo(s) em {len(segmentos)} segmento(s). "
+          f"Os arquivos substituídos serão removidos na próxima compactação após {carencia}s.")
+    return {"segmentos": segmentos, "substituidos": sorted(relativos_substituidos)}
+
+# --- Exemplo de Uso ---
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Compacta os arquivos Parquet mensais em um segmento por ano.")
+    parser.add_argument("pasta", nargs="?", default="dados_aeroportuarios_parquet", help="Pasta do dataset Parquet")
+    parser.add_argument("--anos", type=int, nargs="+", help="Anos a compactar (padrão: todos com mais de um arquivo)")
+    parser.add_argument("--carencia", type=int, default=CARENCIA_REMOCAO, help="Segundos até remover os arquivos substituídos")
+    parser.add_argument("--limpar", action="store_true", help="Apenas remove os arquivos substituídos cuja carência já passou")
+    args = parser.parse_args()
+
+    if args.limpar:
+        removidos = remover_obsoletos(os.path.abspath(args.pasta), args.carencia)
+        print(f"{len(removidos)} arquivo(s) removido(s).")
+    else:
+        compactar_dataset(args.pasta, args.anos, args.carencia)
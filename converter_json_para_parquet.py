@@ -1,14 +1,543 @@
 import pandas as pd
 import json
 import os
+import glob
+import hashlib
+import multiprocessing
+import time
+from concurrent.futures import ProcessPoolExecutor, FIRST_COMPLETED, wait
+from concurrent.futures.process import BrokenProcessPool
+import inspect
+import pyarrow as pa
+import pyarrow.compute as pc
 import pyarrow.parquet as pq
+from queries.agregados import construir_agregados
+from queries.manifest import ARQUIVO_MANIFESTO, atualizar_manifesto
+from queries.banco_nativo import carregar_banco_nativo
+from queries.connection import BACKEND_DADOS
 
 # --- Documentação do Código ---
 # Este script demonstra como converter arquivos JSON de movimentações aeroportuárias
 # para o formato Parquet. O formato Parquet é mais eficiente para armazenamento
 # e leitura de grandes volumes de dados tabulares, especialmente para consultas analíticas.
 
-def converter_json_para_parquet(pasta_entrada, pasta_saida):
+# Versão do formato dos arquivos Parquet gerados. Incrementar sempre que o tratamento dos dados
+# ou o esquema de saída mudar, para que a conversão incremental refaça todos os arquivos.
+VERSAO_SCHEMA = 3
+
+# Manifesto, na pasta de saída, com o hash e a versão de esquema de cada JSON já convertido
+ARQUIVO_MANIFESTO_INGESTAO = '_manifesto_ingestao.json'
+
+# Esquema dos arquivos Parquet gerados: códigos (ICAO, operador, datas...) com dicionário,
+# inteiros estreitos, total de passageiros pré-calculado e horários achatados em minutos do dia
+CODIGO = pa.dictionary(pa.int32(), pa.string())
+ESQUEMA_PARQUET = pa.schema([
+    ('ANO', pa.int16()),
+    ('MES', pa.int8()),
+    ('NR_AEROPORTO_REFERENCIA', CODIGO),
+    ('NR_MOVIMENTO_TIPO', CODIGO),
+    ('NR_AERONAVE_MARCAS', CODIGO),
+    ('NR_AERONAVE_TIPO', CODIGO),
+    ('NR_AERONAVE_OPERADOR', CODIGO),
+    ('NR_VOO_OUTRO_AEROPORTO', CODIGO),
+    ('NR_VOO_NUMERO', pa.string()),
+    ('NR_SERVICE_TYPE', CODIGO),
+    ('NR_NATUREZA', CODIGO),
+    ('DT_PREVISTO', CODIGO),
+    ('MIN_PREVISTO', pa.int16()),
+    ('DT_CALCO', CODIGO),
+    ('MIN_CALCO', pa.int16()),
+    ('DT_TOQUE', CODIGO),
+    ('MIN_TOQUE', pa.int16()),
+    ('MIN_ATRASO', pa.int32()),
+    ('NR_CABECEIRA', CODIGO),
+    ('NR_BOX', CODIGO),
+    ('NR_PONTE_CONECTOR_REMOTO', pa.int16()),
+    ('NR_TERMINAL', CODIGO),
+    ('QT_PAX_LOCAL', pa.int32()),
+    ('QT_PAX_CONEXAO_DOMESTICO', pa.int32()),
+    ('QT_PAX_CONEXAO_INTERNACIONAL', pa.int32()),
+    ('QT_PAX_TOTAL', pa.int32()),
+    ('QT_CORREIO', pa.int32()),
+    ('QT_CARGA', pa.int32()),
+])
+COMPRESSAO_PARQUET = 'zstd'
+
+# Saída ordenada (opcional): linhas agrupadas por aeroporto, operador e data, para que consultas
+# de um único aeroporto descartem os demais row groups pelas estatísticas de mín./máx. O tamanho do
+# row group é o mesmo da leitura do DuckDB; grupos menores aumentam o custo fixo por grupo e, em
+# arquivos mensais, deixam as consultas mais lentas em vez de mais rápidas.
+COLUNAS_ORDENACAO = ['NR_AEROPORTO_REFERENCIA', 'NR_AERONAVE_OPERADOR', 'DT_PREVISTO', 'MIN_PREVISTO']
+LINHAS_POR_ROW_GROUP_ORDENADO = 122880
+
+# Bloom filters nas colunas de código mais filtradas (dispensam row groups sem o valor procurado,
+# mesmo quando o mín./máx. o incluiria). Exigem uma versão do pyarrow que os suporte.
+COLUNAS_BLOOM_FILTER = ['NR_AEROPORTO_REFERENCIA', 'NR_AERONAVE_OPERADOR', 'NR_VOO_OUTRO_AEROPORTO']
+OPCOES_BLOOM_FILTER = {'ndv': 4096, 'fpp': 0.01}
+SUPORTA_BLOOM_FILTER = 'bloom_filter_options' in inspect.signature(pq.write_table).parameters
+
+# Quantidades (vazias ou inválidas viram 0) e as que compõem o total de passageiros
+COLUNAS_QUANTIDADE = ['QT_PAX_LOCAL', 'QT_PAX_CONEXAO_DOMESTICO', 'QT_PAX_CONEXAO_INTERNACIONAL', 'QT_CORREIO', 'QT_CARGA']
+COLUNAS_PASSAGEIROS = ['QT_PAX_LOCAL', 'QT_PAX_CONEXAO_DOMESTICO', 'QT_PAX_CONEXAO_INTERNACIONAL']
+
+# Colunas de minutos extraídas dos horários do JSON ({"TotalMinutes": ..., "Hours": ...})
+COLUNAS_MINUTOS = {'MIN_PREVISTO': 'HH_PREVISTO', 'MIN_CALCO': 'HH_CALCO', 'MIN_TOQUE': 'HH_TOQUE'}
+
+# Colunas usadas no modo particionado (layout Hive: pasta_saida/ANO=2024/MES=1/arquivo.parquet)
+COLUNAS_PARTICAO = ['ANO', 'MES']
+
+def _medir(etapas, etapa, inicio):
+    """Soma à etapa o tempo decorrido desde `inicio` e retorna o instante atual"""
+    agora = time.perf_counter()
+    etapas[etapa] = etapas.get(etapa, 0.0) + agora - inicio
+    return agora
+
+def _caminhos_particionados(pasta_saida, nome_base):
+    """Lista as saídas particionadas já existentes para um arquivo de origem"""
+    padrao = os.path.join(glob.escape(pasta_saida), 'ANO=*', 'MES=*', glob.escape(f"{nome_base}.parquet"))
+    return glob.glob(padrao)
+
+def _salvar_particionado(df, pasta_saida, nome_base, ordenar=False, etapas=None):
+    """
+    Salva o DataFrame no layout Hive ANO=/MES=, um arquivo por partição.
+
+    As colunas de partição são removidas do arquivo, pois passam a ser lidas do caminho.
+    O nome do arquivo é o do JSON de origem, de modo que reconverter o mesmo mês substitui
+    a saída anterior em vez de duplicá-la.
+
+    Returns:
+        list: Os caminhos dos arquivos Parquet gravados.
+    """
+    etapas = {} if etapas is None else etapas
+    for caminho_antigo in _caminhos_particionados(pasta_saida, nome_base):
+        os.remove(caminho_antigo)
+    caminhos = []
+    for (ano, mes), grupo in df.groupby(COLUNAS_PARTICAO):
+        pasta_particao = os.path.join(pasta_saida, f"ANO={int(ano)}", f"MES={int(mes)}")
+        os.makedirs(pasta_particao, exist_ok=True)
+        caminho = os.path.join(pasta_particao, f"{nome_base}.parquet")
+        inicio = time.perf_counter()
+        tabela = _tabela_no_esquema(grupo).drop_columns(COLUNAS_PARTICAO)
+        inicio = _medir(etapas, 'tipos', inicio)
+        _gravar_tabela(tabela, caminho, ordenar)
+        _medir(etapas, 'gravacao', inicio)
+        caminhos.append(caminho)
+    return caminhos
+
+# Registros lidos do JSON por lote no modo streaming. Os lotes ficam acumulados e só são gravados ao
+# completar um row group de LINHAS_POR_ROW_GROUP_ORDENADO linhas, independentemente do tamanho do lote
+TAMANHO_LOTE_PADRAO = 10000
+
+# Quantidade de caracteres lidos do JSON por vez no modo streaming
+TAMANHO_BLOCO_LEITURA = 1024 * 1024
+
+# Estimativas de memória usadas para limitar as conversões em paralelo
+MEMORIA_BASE_PROCESSO_MB = 150      # Interpretador com pandas, pyarrow e DuckDB carregados
+MEMORIA_POR_REGISTRO_MB = 0.01      # Registro do lote em memória (dicionários + DataFrame), modo streaming
+MEMORIA_ROW_GROUP_MB = 16           # Linhas já convertidas acumuladas até completar um row group, modo streaming
+FATOR_MEMORIA_JSON = 4              # Pico em relação ao tamanho do JSON ao carregá-lo inteiro
+
+def _tratar_tipos(df):
+    """Converte as quantidades (que podem vir como texto no JSON) para inteiros e deriva as colunas calculadas"""
+    for coluna in COLUNAS_QUANTIDADE:
+        valores = df[coluna] if coluna in df else pd.Series(0, index=df.index)
+        df[coluna] = pd.to_numeric(valores, errors='coerce').fillna(0).astype(int)
+    df['QT_PAX_TOTAL'] = df[COLUNAS_PASSAGEIROS].sum(axis=1)
+    for coluna_minutos, coluna_horario in COLUNAS_MINUTOS.items():
+        horarios = df[coluna_horario] if coluna_horario in df else pd.Series(None, index=df.index, dtype=object)
+        df[coluna_minutos] = pd.to_numeric(horarios.map(lambda horario: horario.get('TotalMinutes') if isinstance(horario, dict) else None), errors='coerce')
+    df['MIN_ATRASO'] = _calcular_atraso(df)
+    return df
+
+def _calcular_atraso(df):
+    """Minutos entre o horário previsto e o de calço (negativo se adiantado), considerando a data de cada um"""
+    datas = [pd.to_datetime(df[coluna].astype('string'), errors='coerce', format='%Y-%m-%d') if coluna in df else pd.Series(pd.NaT, index=df.index)
+             for coluna in ('DT_CALCO', 'DT_PREVISTO')]
+    return (datas[0] - datas[1]).dt.days * 1440 + df['MIN_CALCO'] - df['MIN_PREVISTO']
+
+def _tabela_no_esquema(df):
+    """Monta a tabela Arrow no ESQUEMA_PARQUET; colunas ausentes ficam nulas e colunas extras são descartadas"""
+    colunas = []
+    for campo in ESQUEMA_PARQUET:
+        valores = df[campo.name] if campo.name in df else pd.Series(None, index=df.index, dtype=object)
+        if pa.types.is_integer(campo.type):
+            valores = pd.to_numeric(valores, errors='coerce')
+            colunas.append(pa.array(valores, type=campo.type, from_pandas=True))
+        else:
+            # Códigos podem vir como número em alguns registros (ex.: '15' e 15)
+            valores = pa.array(valores.astype('string'), type=pa.string(), from_pandas=True)
+            colunas.append(valores.dictionary_encode() if pa.types.is_dictionary(campo.type) else valores)
+    return pa.Table.from_arrays(colunas, schema=ESQUEMA_PARQUET)
+
+def _ler_registros_json(caminho_json, tamanho_bloco=TAMANHO_BLOCO_LEITURA):
+    """
+    Lê, um a um, os registros de um arquivo JSON cujo conteúdo é uma lista de objetos.
+
+    O arquivo é lido em blocos de `tamanho_bloco` caracteres e cada registro é decodificado
+    assim que está completo, de modo que a memória usada não depende do tamanho do arquivo.
+    """
+    decodificador = json.JSONDecoder()
+    with open(caminho_json, 'r', encoding='utf-8-sig') as f:
+        buffer, posicao, fim_arquivo, dentro_da_lista = '', 0, False, False
+        while True:
+            while posicao < len(buffer) and buffer[posicao] in ' \t\r\n,':
+                posicao += 1
+            if posicao >= len(buffer) and not fim_arquivo:
+                bloco = f.read(tamanho_bloco)
+                buffer, posicao, fim_arquivo = buffer[posicao:] + bloco, 0, not bloco
+                continue
+            if posicao >= len(buffer):
+                if dentro_da_lista: raise json.JSONDecodeError("Lista de registros não finalizada", buffer, posicao)
+                return
+            if not dentro_da_lista:
+                if buffer[posicao] != '[': raise json.JSONDecodeError("O arquivo deve conter uma lista de registros", buffer, posicao)
+                dentro_da_lista = True
+                posicao += 1
+                continue
+            if buffer[posicao] == ']':
+                return
+            try:
+                registro, posicao = decodificador.raw_decode(buffer, posicao)
+            except json.JSONDecodeError:
+                if fim_arquivo: raise
+                # Registro incompleto: lê o próximo bloco e tenta novamente
+                bloco = f.read(tamanho_bloco)
+                buffer, posicao, fim_arquivo = buffer[posicao:] + bloco, 0, not bloco
+                continue
+            yield registro
+
+def _gravar_tabela(tabela, caminho, ordenar=False):
+    """Grava a tabela em Parquet; se `ordenar`, ordena por COLUNAS_ORDENACAO e grava com row groups de tamanho fixo e bloom filters"""
+    if not ordenar:
+        pq.write_table(tabela, caminho, compression=COMPRESSAO_PARQUET)
+        return
+    colunas = [coluna for coluna in COLUNAS_ORDENACAO if coluna in tabela.column_names]
+    ordem = [(coluna, 'ascending') for coluna in colunas]
+    # O pyarrow não ordena colunas com dicionário: calcula a ordem sobre os valores decodificados
+    chaves = pa.table({coluna: tabela[coluna].cast(pa.string()) if pa.types.is_dictionary(tabela[coluna].type) else tabela[coluna] for coluna in colunas})
+    tabela = tabela.take(pc.sort_indices(chaves, sort_keys=ordem))
+    opcoes = {}
+    if SUPORTA_BLOOM_FILTER:
+        opcoes['bloom_filter_options'] = {coluna: OPCOES_BLOOM_FILTER for coluna in COLUNAS_BLOOM_FILTER if coluna in tabela.column_names}
+    pq.write_table(tabela, caminho, compression=COMPRESSAO_PARQUET, row_group_size=LINHAS_POR_ROW_GROUP_ORDENADO,
+                   sorting_columns=pq.SortingColumn.from_ordering(tabela.schema, ordem), **opcoes)
+
+def _ordenar_arquivo(caminho):
+    """Regrava um arquivo Parquet já gerado na ordem de COLUNAS_ORDENACAO (substituição atômica)"""
+    _gravar_tabela(pq.read_table(caminho), caminho + ".tmp", ordenar=True)
+    os.replace(caminho + ".tmp", caminho)
+
+def _converter_em_streaming(caminho_json, pasta_saida, nome_base, particionar, tamanho_lote, etapas=None):
+    """
+    Converte um arquivo JSON em Parquet lote a lote. Os lotes convertidos são acumulados e gravados em
+    row groups de LINHAS_POR_ROW_GROUP_ORDENADO linhas (o último pode ser menor), como na conversão completa.
+
+    Os arquivos são gravados com a extensão '.tmp' e só substituem a saída anterior quando a
+    conversão termina sem erros. O tempo de cada etapa é somado em `etapas`, se informado.
+
+    Returns:
+        tuple: Os caminhos dos arquivos Parquet gravados e o número de linhas convertidas.
+    """
+    escritores = {}
+    pendentes = {} # Tabelas ainda não gravadas de cada partição
+    linhas = 0
+    etapas = {} if etapas is None else etapas
+
+    def descarregar(particao, final=False):
+        tabelas = pendentes.get(particao)
+        if not tabelas: return
+        tabela = pa.concat_tables(tabelas)
+        if not final and tabela.num_rows < LINHAS_POR_ROW_GROUP_ORDENADO: return
+        completas = tabela.num_rows if final else tabela.num_rows - tabela.num_rows % LINHAS_POR_ROW_GROUP_ORDENADO
+        escritores[particao][1].write_table(tabela.slice(0, completas), row_group_size=LINHAS_POR_ROW_GROUP_ORDENADO)
+        pendentes[particao] = [tabela.slice(completas)] if completas < tabela.num_rows else []
+
+    def gravar(registros):
+        inicio = time.perf_counter()
+        df = pd.DataFrame(registros)
+        inicio = _medir(etapas, 'leitura_json', inicio)
+        tabela = _tabela_no_esquema(_tratar_tipos(df))
+        inicio = _medir(etapas, 'tipos', inicio)
+        if not particionar:
+            grupos = {None: tabela}
+        else:
+            chaves = pa.Table.from_arrays([tabela[c] for c in COLUNAS_PARTICAO], names=COLUNAS_PARTICAO).to_pandas()
+            grupos = {}
+            for (ano, mes), indices in chaves.groupby(COLUNAS_PARTICAO).indices.items():
+                grupos[(int(ano), int(mes))] = tabela.take(indices).drop_columns(COLUNAS_PARTICAO)
+        for particao, tabela_particao in grupos.items():
+            if particao not in escritores:
+                if particao is None:
+                    caminho = os.path.join(pasta_saida, f"{nome_base}.parquet")
+                else:
+                    pasta_particao = os.path.join(pasta_saida, f"ANO={particao[0]}", f"MES={particao[1]}")
+                    os.makedirs(pasta_particao, exist_ok=True)
+                    caminho = os.path.join(pasta_particao, f"{nome_base}.parquet")
+                escritores[particao] = (caminho, pq.ParquetWriter(caminho + ".tmp", tabela_particao.schema, compression=COMPRESSAO_PARQUET))
+            pendentes.setdefault(particao, []).append(tabela_particao)
+            descarregar(particao)
+        _medir(etapas, 'gravacao', inicio)
+
+    try:
+        lote = []
+        inicio_leitura = time.perf_counter()
+        for registro in _ler_registros_json(caminho_json):
+            lote.append(registro)
+            if len(lote) >= tamanho_lote:
+                _medir(etapas, 'leitura_json', inicio_leitura)
+                gravar(lote)
+                linhas += len(lote)
+                lote = []
+                inicio_leitura = time.perf_counter()
+        _medir(etapas, 'leitura_json', inicio_leitura)
+        if lote:
+            gravar(lote)
+            linhas += len(lote)
+        inicio = time.perf_counter()
+        for particao in escritores:
+            descarregar(particao, final=True)
+        _medir(etapas, 'gravacao', inicio)
+    except Exception:
+        for caminho, escritor in escritores.values():
+            escritor.close()
+            os.remove(caminho + ".tmp")
+        raise
+
+    for caminho, escritor in escritores.values():
+        escritor.close()
+    if escritores:
+        # Remove as saídas anteriores do mesmo arquivo de origem, em qualquer layout
+        caminho_plano = os.path.join(pasta_saida, f"{nome_base}.parquet")
+        for caminho_antigo in _caminhos_particionados(pasta_saida, nome_base) + [caminho_plano]:
+            if os.path.exists(caminho_antigo):
+                os.remove(caminho_antigo)
+        for caminho, _ in escritores.values():
+            os.replace(caminho + ".tmp", caminho)
+    return [caminho for caminho, _ in escritores.values()], linhas
+
+def _converter_arquivo(caminho_json, pasta_saida, particionar, gerar_agregados, modo_streaming, tamanho_lote, ordenar=False):
+    """
+    Converte um único arquivo JSON (e gera seus agregados). Executado nos processos do pool
+    no modo paralelo, por isso recebe apenas argumentos simples.
+
+    Returns:
+        dict: Estatísticas da conversão ('arquivo', 'status', 'linhas', 'megabytes', 'segundos', e o
+        tempo de cada etapa em 'etapas': leitura_json, tipos, gravacao, ordenacao e agregados).
+    """
+    inicio = time.perf_counter()
+    nome_arquivo = os.path.basename(caminho_json)
+    nome_base, _ = os.path.splitext(nome_arquivo)
+    caminho_parquet = os.path.join(pasta_saida, f"{nome_base}.parquet")
+    etapas = {}
+    estatisticas = {"arquivo": nome_arquivo, "linhas": 0, "megabytes": os.path.getsize(caminho_json) / (1024*1024), "etapas": etapas}
+
+    print(f"\nConvertendo {nome_arquivo} para Parquet...")
+    print(f"DEBUG: Caminho completo do JSON: {caminho_json}")
+    print(f"DEBUG: Tamanho do JSON a ser lido: {os.path.getsize(caminho_json) / (1024*1024):.2f} MB")
+
+    try:
+        if modo_streaming:
+            caminhos, linhas = _converter_em_streaming(caminho_json, pasta_saida, nome_base, particionar, tamanho_lote, etapas)
+            if ordenar:
+                # A ordenação exige o arquivo inteiro: é feita sobre a saída já compactada, não sobre o JSON
+                inicio_etapa = time.perf_counter()
+                for caminho in caminhos:
+                    _ordenar_arquivo(caminho)
+                _medir(etapas, 'ordenacao', inicio_etapa)
+            if not linhas:
+                print(f"AVISO: O arquivo JSON '{nome_arquivo}' foi lido, mas resultou em dados vazios.")
+                return {**estatisticas, "status": "vazio", "segundos": time.perf_counter() - inicio}
+            print(f"DEBUG: {linhas} linhas convertidas em lotes de até {tamanho_lote} registros.")
+            for caminho in caminhos:
+                print(f"  -> Salvo como {os.path.relpath(caminho, pasta_saida)} (Tamanho: {os.path.getsize(caminho) / (1024*1024):.2f} MB)")
+        else:
+            inicio_etapa = time.perf_counter()
+            # --- ALTERAÇÃO AQUI: USANDO encoding='utf-8-sig' ---
+            with open(caminho_json, 'r', encoding='utf-8-sig') as f: #
+                dados = json.load(f)
+
+            # Verifica se os dados carregados estão vazios ou muito pequenos
+            if not dados:
+                print(f"AVISO: O arquivo JSON '{nome_arquivo}' foi lido, mas resultou em dados vazios.")
+                return {**estatisticas, "status": "vazio", "segundos": time.perf_counter() - inicio}
+
+            df = pd.DataFrame(dados)
+            linhas = len(df)
+            del dados
+            inicio_etapa = _medir(etapas, 'leitura_json', inicio_etapa)
+
+            print(f"DEBUG: DataFrame carregado. Número de linhas: {len(df)}")
+            # Comentar as próximas linhas de head() e info() para evitar saída muito grande para 215MB
+            # print(f"DEBUG: Primeiras 5 linhas do DataFrame (antes do tratamento de tipo):")
+            # print(df.head())
+            # print(f"DEBUG: Tipos de dados (antes do tratamento):")
+            # df.info()
+
+
+            # --- Tratamento de Tipos de Dados ---
+            df = _tratar_tipos(df)
+            inicio_etapa = _medir(etapas, 'tipos', inicio_etapa)
+
+            # Comentar as próximas linhas de info() para evitar saída muito grande para 215MB
+            # print(f"DEBUG: Tipos de dados (após tratamento):")
+            # df.info()
+
+            # Salva o DataFrame como Parquet
+            if particionar:
+                if os.path.exists(caminho_parquet):
+                    os.remove(caminho_parquet) # Evita duplicar o mês no layout plano
+                caminhos = _salvar_particionado(df, pasta_saida, nome_base, ordenar, etapas)
+                for caminho in caminhos:
+                    print(f"  -> Salvo como {os.path.relpath(caminho, pasta_saida)} (Tamanho: {os.path.getsize(caminho) / (1024*1024):.2f} MB)")
+            else:
+                for caminho_antigo in _caminhos_particionados(pasta_saida, nome_base):
+                    os.remove(caminho_antigo) # Evita duplicar o mês no layout particionado
+                tabela = _tabela_no_esquema(df)
+                inicio_etapa = _medir(etapas, 'tipos', inicio_etapa)
+                _gravar_tabela(tabela, caminho_parquet, ordenar)
+                _medir(etapas, 'gravacao', inicio_etapa)
+                caminhos = [caminho_parquet]
+                print(f"  -> Salvo como {nome_base}.parquet (Tamanho: {os.path.getsize(caminho_parquet) / (1024*1024):.2f} MB)")
+
+        if gerar_agregados:
+            inicio_etapa = time.perf_counter()
+            for caminho in construir_agregados(pasta_saida, [f"{nome_base}.parquet"], forcar=True):
+                print(f"  -> Agregado salvo em {os.path.relpath(caminho, pasta_saida)} (Tamanho: {os.path.getsize(caminho) / 1024:.1f} KB)")
+            _medir(etapas, 'agregados', inicio_etapa)
+    except json.JSONDecodeError as e:
+        print(f"  Erro ao decodificar JSON no arquivo '{nome_arquivo}': {e}")
+        print(f"  Por favor, verifique se o arquivo '{nome_arquivo}' é um JSON válido.")
+        return {**estatisticas, "status": "erro", "segundos": time.perf_counter() - inicio}
+    except Exception as e:
+        print(f"  Ocorreu um erro inesperado ao converter {nome_arquivo}: {e}")
+        return {**estatisticas, "status": "erro", "segundos": time.perf_counter() - inicio}
+    saidas = [os.path.relpath(caminho, pasta_saida) for caminho in caminhos]
+    megabytes_saida = sum(os.path.getsize(caminho) for caminho in caminhos) / (1024*1024)
+    return {**estatisticas, "status": "ok", "linhas": linhas, "saidas": saidas, "megabytes_saida": megabytes_saida, "segundos": time.perf_counter() - inicio}
+
+def _calcular_hash(caminho, tamanho_bloco=TAMANHO_BLOCO_LEITURA):
+    """Calcula o SHA-256 do conteúdo de um arquivo, lendo-o em blocos"""
+    sha256 = hashlib.sha256()
+    with open(caminho, 'rb') as f:
+        for bloco in iter(lambda: f.read(tamanho_bloco), b''):
+            sha256.update(bloco)
+    return sha256.hexdigest()
+
+def _carregar_manifesto_ingestao(pasta_saida):
+    """Lê o manifesto de ingestão da pasta de saída ({nome do JSON: entrada}), ou {} se não existir"""
+    caminho = os.path.join(pasta_saida, ARQUIVO_MANIFESTO_INGESTAO)
+    try:
+        with open(caminho, 'r', encoding='utf-8') as f:
+            return json.load(f).get('arquivos', {})
+    except (OSError, ValueError):
+        return {}
+
+def _gravar_manifesto_ingestao(pasta_saida, arquivos):
+    """Grava o manifesto de ingestão de forma atômica (arquivo temporário + os.replace)"""
+    caminho = os.path.join(pasta_saida, ARQUIVO_MANIFESTO_INGESTAO)
+    with open(caminho + '.tmp', 'w', encoding='utf-8') as f:
+        json.dump({'versao_schema': VERSAO_SCHEMA, 'arquivos': arquivos}, f, ensure_ascii=False, indent=1)
+    os.replace(caminho + '.tmp', caminho)
+
+def _descrever_origem(caminho_json, entrada_anterior):
+    """
+    Descreve o JSON de origem (hash, tamanho e data de modificação).
+
+    O hash só é recalculado se o tamanho ou a data de modificação mudaram desde a última conversão.
+    """
+    estado = os.stat(caminho_json)
+    if entrada_anterior and entrada_anterior['tamanho'] == estado.st_size and entrada_anterior['modificado_em'] == estado.st_mtime_ns:
+        sha256 = entrada_anterior['sha256']
+    else:
+        sha256 = _calcular_hash(caminho_json)
+    return {'sha256': sha256, 'tamanho': estado.st_size, 'modificado_em': estado.st_mtime_ns}
+
+def _saida_atualizada(pasta_saida, origem, entrada_anterior, particionar, ordenar):
+    """Indica se a saída Parquet registrada para o JSON ainda corresponde ao conteúdo e ao formato atuais"""
+    if not entrada_anterior: return False
+    if entrada_anterior['sha256'] != origem['sha256']: return False
+    if entrada_anterior.get('versao_schema') != VERSAO_SCHEMA or entrada_anterior.get('particionar') != particionar: return False
+    if entrada_anterior.get('ordenar', False) != ordenar: return False
+    saidas = entrada_anterior.get('saidas') or []
+    return bool(saidas) and all(os.path.exists(os.path.join(pasta_saida, saida)) for saida in saidas)
+
+def _memoria_estimada_mb(caminho_json, modo_streaming, tamanho_lote):
+    """Estima o pico de memória (MB) de um processo convertendo o arquivo"""
+    if modo_streaming:
+        return MEMORIA_BASE_PROCESSO_MB + tamanho_lote * MEMORIA_POR_REGISTRO_MB + MEMORIA_ROW_GROUP_MB
+    return MEMORIA_BASE_PROCESSO_MB + FATOR_MEMORIA_JSON * os.path.getsize(caminho_json) / (1024*1024)
+
+def _imprimir_vazao(resultado):
+    """Imprime a vazão (MB/s e linhas/s) da conversão de um arquivo"""
+    segundos = max(resultado['segundos'], 1e-9)
+    print(f"  -> {resultado['arquivo']}: {resultado['status']} em {resultado['segundos']:.1f}s "
+          f"({resultado['megabytes'] / segundos:.1f} MB/s, {resultado['linhas'] / segundos:,.0f} linhas/s)")
+
+def _imprimir_resumo(resultados, segundos):
+    """Imprime o resumo da conversão de todos os arquivos"""
+    if not resultados: return
+    megabytes = sum(r['megabytes'] for r in resultados)
+    linhas = sum(r['linhas'] for r in resultados)
+    erros = [r['arquivo'] for r in resultados if r['status'] == 'erro']
+    segundos = max(segundos, 1e-9)
+    print(f"\nResumo: {len(resultados)} arquivo(s), {megabytes:.1f} MB, {linhas:,} linhas em {segundos:.1f}s "
+          f"({megabytes / segundos:.1f} MB/s, {linhas / segundos:,.0f} linhas/s)")
+    if erros:
+        print(f"  Arquivos com erro: {', '.join(erros)}")
+
+def _resultado_erro(caminho_json, segundos=0.0):
+    """Estatísticas de um arquivo cuja conversão não chegou a retornar (processo do pool com erro)"""
+    return {"arquivo": os.path.basename(caminho_json), "status": "erro", "linhas": 0, "megabytes": os.path.getsize(caminho_json) / (1024*1024),
+            "etapas": {}, "segundos": segundos}
+
+def _converter_em_paralelo(arquivos_json, argumentos, processos, limite_memoria_mb):
+    """
+    Distribui os arquivos entre os processos do pool, do maior para o menor.
+
+    Um novo arquivo só é iniciado se a soma das memórias estimadas dos arquivos em conversão
+    couber em `limite_memoria_mb` (sempre há pelo menos um em andamento).
+
+    Se um processo do pool morrer (ex.: falta de memória), os arquivos em conversão e os ainda não
+    iniciados são marcados com status 'erro'; os já convertidos continuam no resultado.
+    """
+    _, _, _, modo_streaming, tamanho_lote, _ = argumentos
+    processos = processos or os.cpu_count() or 1
+    pendentes = sorted(arquivos_json, key=os.path.getsize, reverse=True)
+    em_andamento = {}
+    resultados = []
+    contexto = multiprocessing.get_context("spawn") # Processos novos, sem herdar conexões do DuckDB
+    pool_quebrado = False # Um processo morreu: o pool não aceita novos arquivos
+    with ProcessPoolExecutor(max_workers=processos, mp_context=contexto) as executor:
+        while em_andamento or (pendentes and not pool_quebrado):
+            while pendentes and not pool_quebrado and len(em_andamento) < processos:
+                memoria = _memoria_estimada_mb(pendentes[0], modo_streaming, tamanho_lote)
+                em_uso = sum(memoria for _, memoria, _ in em_andamento.values())
+                if em_andamento and limite_memoria_mb and em_uso + memoria > limite_memoria_mb:
+                    break
+                try:
+                    em_andamento[executor.submit(_converter_arquivo, pendentes[0], *argumentos)] = (pendentes[0], memoria, time.perf_counter())
+                except BrokenProcessPool:
+                    pool_quebrado = True
+                    break
+                pendentes.pop(0)
+            if not em_andamento: break
+            concluidos, _ = wait(em_andamento, return_when=FIRST_COMPLETED)
+            for futuro in concluidos:
+                caminho_json, _, inicio = em_andamento.pop(futuro)
+                try:
+                    resultados.append(futuro.result())
+                except Exception as e:
+                    pool_quebrado = pool_quebrado or isinstance(e, BrokenProcessPool)
+                    print(f"DEBUG: Erro ao converter {os.path.basename(caminho_json)} em paralelo: {e}")
+                    resultados.append(_resultado_erro(caminho_json, time.perf_counter() - inicio))
+                _imprimir_vazao(resultados[-1])
+    for caminho_json in pendentes:
+        print(f"DEBUG: Erro ao converter {os.path.basename(caminho_json)} em paralelo: o pool de processos foi encerrado antes do início")
+        resultados.append(_resultado_erro(caminho_json))
+    return resultados
+
+def converter_json_para_parquet(pasta_entrada, pasta_saida, particionar=False, gerar_agregados=True, modo_streaming=False, tamanho_lote=TAMANHO_LOTE_PADRAO,
+                                processos=1, limite_memoria_mb=None, incremental=False, ordenar=False, banco_nativo=False):
     """
     Converte todos os arquivos JSON em uma pasta de entrada para o formato Parquet
     e os salva em uma pasta de saída.
@@ -16,6 +545,34 @@ def converter_json_para_parquet(pasta_entrada, pasta_saida):
     Args:
         pasta_entrada (str): O caminho para a pasta que contém os arquivos JSON.
         pasta_saida (str): O caminho para a pasta onde os arquivos Parquet serão salvos.
+        particionar (bool): Se True, grava no layout Hive (ANO=.../MES=...) para que
+            consultas filtradas por ano ou mês leiam apenas as pastas correspondentes.
+        gerar_agregados (bool): Se True, gera também as tabelas pré-agregadas (ex.: '_rollup')
+            usadas automaticamente pelas consultas.
+        modo_streaming (bool): Se True, lê o JSON registro a registro e grava o Parquet em lotes
+            de `tamanho_lote` linhas, mantendo o uso de memória constante para arquivos de qualquer
+            tamanho. Se False, carrega o arquivo inteiro em um DataFrame.
+        tamanho_lote (int): Registros lidos por lote no modo streaming (os row groups têm sempre
+            LINHAS_POR_ROW_GROUP_ORDENADO linhas).
+        processos (int): Quantidade de arquivos convertidos em paralelo, cada um em um processo.
+            Se None, usa o número de núcleos da máquina.
+        limite_memoria_mb (float): Memória total (estimada) que as conversões simultâneas podem
+            ocupar; arquivos grandes aguardam até que haja espaço. Se None, não há limite.
+        incremental (bool): Se True, converte apenas os JSON novos ou alterados (pelo hash SHA-256),
+            ou cuja saída foi gerada com outra VERSAO_SCHEMA ou outro layout, registrando-os em
+            '_manifesto_ingestao.json' na pasta de saída. Se False, os JSON não são lidos para o hash
+            e os arquivos convertidos apenas saem do manifesto de ingestão, se houver.
+        ordenar (bool): Se True, grava as linhas ordenadas por aeroporto, operador e data, em row
+            groups de LINHAS_POR_ROW_GROUP_ORDENADO linhas e com bloom filters nas colunas de código,
+            para que consultas de um único aeroporto ou operador leiam poucos row groups (e menos
+            dados, pois a ordenação também melhora a compressão).
+        banco_nativo (bool): Se True, carrega também o dataset completo na tabela nativa do banco
+            '_banco.duckdb' da pasta de saída, usado pelas consultas com BACKEND_DADOS = "duckdb".
+
+    Returns:
+        dict: As estatísticas de cada arquivo convertido ('arquivos', ver _converter_arquivo) e o tempo
+        total, em segundos, das etapas executadas uma vez por pasta ('etapas': verificacao_incremental,
+        conversao, manifesto e banco_nativo).
     """
     if not os.path.exists(pasta_entrada):
         print(f"Erro: A pasta de entrada '{pasta_entrada}' não foi encontrada.")
@@ -32,54 +589,62 @@ def converter_json_para_parquet(pasta_entrada, pasta_saida):
         else:
             print(f"  - {item} (Diretório)")
 
+    arquivos_json = sorted(os.path.join(pasta_entrada, nome) for nome in os.listdir(pasta_entrada) if nome.endswith('.json'))
+    manifesto_ingestao = _carregar_manifesto_ingestao(pasta_saida)
+    origens = {}
+    etapas = {}
+    inicio = time.perf_counter()
+    if incremental:
+        for caminho_json in list(arquivos_json):
+            nome_arquivo = os.path.basename(caminho_json)
+            origens[nome_arquivo] = _descrever_origem(caminho_json, manifesto_ingestao.get(nome_arquivo))
+            if _saida_atualizada(pasta_saida, origens[nome_arquivo], manifesto_ingestao.get(nome_arquivo), particionar, ordenar):
+                print(f"Ignorando {nome_arquivo}: já convertido e sem alterações.")
+                manifesto_ingestao[nome_arquivo].update(origens[nome_arquivo])
+                arquivos_json.remove(caminho_json)
+        inicio = _medir(etapas, 'verificacao_incremental', inicio)
+    argumentos = (pasta_saida, particionar, gerar_agregados, modo_streaming, tamanho_lote, ordenar)
+    resultados = []
+    if processos == 1 or len(arquivos_json) <= 1:
+        for caminho_json in arquivos_json:
+            resultados.append(_converter_arquivo(caminho_json, *argumentos))
+            _imprimir_vazao(resultados[-1])
+    else:
+        resultados = _converter_em_paralelo(arquivos_json, argumentos, processos, limite_memoria_mb)
+    _imprimir_resumo(resultados, time.perf_counter() - inicio)
+    _medir(etapas, 'conversao', inicio)
 
-    for nome_arquivo in os.listdir(pasta_entrada):
-        if nome_arquivo.endswith('.json'):
-            caminho_json = os.path.join(pasta_entrada, nome_arquivo)
-            nome_base, _ = os.path.splitext(nome_arquivo)
-            caminho_parquet = os.path.join(pasta_saida, f"{nome_base}.parquet")
-
-            print(f"\nConvertendo {nome_arquivo} para Parquet...")
-            print(f"DEBUG: Caminho completo do JSON: {caminho_json}")
-            print(f"DEBUG: Tamanho do JSON a ser lido: {os.path.getsize(caminho_json) / (1024*1024):.2f} MB")
-
-            try:
-                # --- ALTERAÇÃO AQUI: USANDO encoding='utf-8-sig' ---
-                with open(caminho_json, 'r', encoding='utf-8-sig') as f: #
-                    dados = json.load(f)
-
-                # Verifica se os dados carregados estão vazios ou muito pequenos
-                if not dados:
-                    print(f"AVISO: O arquivo JSON '{nome_arquivo}' foi lido, mas resultou em dados vazios.")
-                    continue # Pula para o próximo arquivo, se houver
-
-                df = pd.DataFrame(dados)
+    if incremental:
+        # Registra os arquivos convertidos para que as próximas execuções incrementais os ignorem
+        for resultado in resultados:
+            nome_arquivo = resultado['arquivo']
+            if resultado['status'] != 'ok':
+                manifesto_ingestao.pop(nome_arquivo, None)
+                continue
+            manifesto_ingestao[nome_arquivo] = {**origens[nome_arquivo], 'versao_schema': VERSAO_SCHEMA, 'particionar': particionar, 'ordenar': ordenar,
+                                               'saidas': resultado['saidas'], 'linhas': resultado['linhas']}
+        _gravar_manifesto_ingestao(pasta_saida, manifesto_ingestao)
+    elif manifesto_ingestao:
+        # Sem calcular hashes: apenas esquece os arquivos reconvertidos, que a próxima execução incremental verifica de novo
+        for resultado in resultados:
+            manifesto_ingestao.pop(resultado['arquivo'], None)
+        _gravar_manifesto_ingestao(pasta_saida, manifesto_ingestao)
 
-                print(f"DEBUG: DataFrame carregado. Número de linhas: {len(df)}")
-                # Comentar as próximas linhas de head() e info() para evitar saída muito grande para 215MB
-                # print(f"DEBUG: Primeiras 5 linhas do DataFrame (antes do tratamento de tipo):")
-                # print(df.head())
-                # print(f"DEBUG: Tipos de dados (antes do tratamento):")
-                # df.info()
+    # Registra a cobertura (anos/meses), o número de linhas e o mín./máx. das colunas de cada arquivo
+    inicio = time.perf_counter()
+    manifesto = atualizar_manifesto(pasta_saida)
+    inicio = _medir(etapas, 'manifesto', inicio)
+    print(f"\nManifesto atualizado: {len(manifesto['arquivos'])} arquivo(s) em '{os.path.join(pasta_saida, ARQUIVO_MANIFESTO)}'")
 
-
-                # --- Tratamento de Tipos de Dados ---
-                df['QT_PAX_LOCAL'] = pd.to_numeric(df['QT_PAX_LOCAL'], errors='coerce').fillna(0).astype(int)
-                df['QT_PAX_CONEXAO_DOMESTICO'] = pd.to_numeric(df['QT_PAX_CONEXAO_DOMESTICO'], errors='coerce').fillna(0).astype(int)
-                df['QT_CARGA'] = pd.to_numeric(df['QT_CARGA'], errors='coerce').fillna(0).astype(int)
-
-                # Comentar as próximas linhas de info() para evitar saída muito grande para 215MB
-                # print(f"DEBUG: Tipos de dados (após tratamento):")
-                # df.info()
-
-                # Salva o DataFrame como Parquet
-                df.to_parquet(caminho_parquet, index=False)
-                print(f"  -> Salvo como {nome_base}.parquet (Tamanho: {os.path.getsize(caminho_parquet) / (1024*1024):.2f} MB)")
-            except json.JSONDecodeError as e:
-                print(f"  Erro ao decodificar JSON no arquivo '{nome_arquivo}': {e}")
-                print(f"  Por favor, verifique se o arquivo '{nome_arquivo}' é um JSON válido.")
-            except Exception as e:
-                print(f"  Ocorreu um erro inesperado ao converter {nome_arquivo}: {e}")
+    if banco_nativo:
+        try:
+            caminho_banco = carregar_banco_nativo(pasta_saida)
+            _medir(etapas, 'banco_nativo', inicio)
+            if caminho_banco:
+                print(f"Banco nativo atualizado: '{caminho_banco}' ({os.path.getsize(caminho_banco) / (1024*1024):.2f} MB)")
+        except Exception as e:
+            print(f"Ocorreu um erro ao carregar o banco nativo: {e}")
+    return {"arquivos": resultados, "etapas": etapas}
 
 # --- Exemplo de Uso ---
 if __name__ == "__main__":
@@ -93,17 +658,20 @@ if __name__ == "__main__":
     # Lembre-se: O SEU ARQUIVO Movimentacoes_Aeroportuarias_202401.json (215.04 MB)
     # DEVE JÁ ESTAR NA PASTA 'dados_aeroportuarios' ANTES DE RODAR ESTE SCRIPT!
 
-    converter_json_para_parquet(pasta_json_origem, pasta_parquet_destino)
+    converter_json_para_parquet(pasta_json_origem, pasta_parquet_destino, banco_nativo=BACKEND_DADOS == "duckdb")
+
+    # Gera as tabelas agregadas que ainda faltam para os arquivos Parquet já existentes
+    construir_agregados(pasta_parquet_destino)
 
     print(f"\nConversão concluída. Verifique a pasta '{pasta_parquet_destino}' para os arquivos Parquet.")
 
     # Opcional: Verificar o conteúdo de um arquivo Parquet
     try:
-        arquivos_parquet = [f for f in os.listdir(pasta_parquet_destino) if f.endswith('.parquet')]
+        arquivos_parquet = sorted(glob.glob(os.path.join(pasta_parquet_destino, '**', '*.parquet'), recursive=True))
         if arquivos_parquet:
-            primeiro_parquet = os.path.join(pasta_parquet_destino, arquivos_parquet[0])
+            primeiro_parquet = arquivos_parquet[0]
             df_teste_parquet = pd.read_parquet(primeiro_parquet)
-            print(f"\nConteúdo do primeiro arquivo Parquet ({arquivos_parquet[0]}):")
+            print(f"\nConteúdo do primeiro arquivo Parquet ({os.path.relpath(primeiro_parquet, pasta_parquet_destino)}):")
             print(df_teste_parquet.head())
             print("\nInformações sobre o DataFrame do Parquet:")
             df_teste_parquet.info()
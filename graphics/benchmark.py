@@ -0,0 +1,115 @@
+import argparse
+import os
+import sys
+import threading
+import time
+import pandas as pd
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from graphics.charts import estatisticas_graficos, gerar_grafico_historico, gerar_grafico_market_share
+
+# --- Documentação do Código ---
+# Renderiza milhares de gráficos com dados sempre diferentes (sem acertos no cache) e acompanha a
+# memória residente (RSS) do processo, para confirmar que ela se estabiliza em vez de crescer a
+# cada gráfico. Uso: python -m graphics.benchmark --graficos 2000 --threads 4
+
+APP_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+LOGO_PATH = os.path.join(APP_DIR, "images", "logo.png")
+
+# Operadores usados nos dados sintéticos de market share
+OPERADORES = ["AZU", "GLO", "TAM", "PTB", "TTL", "ACN", "LTG", "OMI"]
+
+def memoria_residente_mb():
+    """Memória residente (RSS) atual do processo em MB; no Linux lê /proc, nos demais usa o pico"""
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE") / (1024*1024)
+    except (OSError, ValueError):
+        import resource
+        fator = 1024 * 1024 if sys.platform == 'darwin' else 1024
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / fator
+
+def _dados_market_share(i):
+    """Participações sintéticas, diferentes a cada i"""
+    pesos = [(i * (j + 3)) % 97 + 1 for j in range(len(OPERADORES))]
+    total = sum(pesos)
+    return [{"NR_AERONAVE_OPERADOR": op, "VooShare": 100 * p / total, "PaxShare": 100 * p / total} for op, p in zip(OPERADORES, pesos)]
+
+def _dados_historico(i):
+    """Série anual sintética, diferente a cada i"""
+    return pd.DataFrame({"ANO": range(2019, 2025), "TotalValor": [(i + 1) * 1000 + ano * 37 % 500 for ano in range(6)]})
+
+def _renderizar(i, logo_path):
+    """Renderiza o i-ésimo gráfico, alternando entre market share e histórico"""
+    if i % 2 == 0:
+        return gerar_grafico_market_share(_dados_market_share(i), logo_path=logo_path)
+    return gerar_grafico_historico(_dados_historico(i), "passageiros", "Brasil", logo_path=logo_path)
+
+def medir_renderizacao(graficos=2000, threads=1, amostras=10, logo_path=LOGO_PATH):
+    """
+    Renderiza `graficos` gráficos distintos em `threads` threads e mede a memória a cada lote.
+
+    Returns:
+        dict: RSS inicial, final e máximo (MB), as amostras de RSS, o tempo total e por gráfico e as
+        estatísticas do cache de gráficos.
+    """
+    proximo = iter(range(graficos))
+    lock_proximo = threading.Lock()
+    falhas = []
+    amostras_rss = []
+    intervalo = max(graficos // amostras, 1)
+
+    def trabalhar():
+        while True:
+            with lock_proximo:
+                i = next(proximo, None)
+            if i is None: return
+            if _renderizar(i, logo_path) is None:
+                falhas.append(i)
+            if (i + 1) % intervalo == 0:
+                amostras_rss.append((i + 1, memoria_residente_mb()))
+
+    # Aquece o Matplotlib (fontes, marca d'água) antes da medição inicial
+    _renderizar(graficos, logo_path)
+    _renderizar(graficos + 1, logo_path)
+    rss_inicial = memoria_residente_mb()
+    inicio = time.perf_counter()
+    trabalhadores = [threading.Thread(target=trabalhar) for _ in range(threads)]
+    for trabalhador in trabalhadores: trabalhador.start()
+    for trabalhador in trabalhadores: trabalhador.join()
+    segundos = time.perf_counter() - inicio
+
+    amostras_rss.sort()
+    return {
+        "graficos": graficos,
+        "threads": threads,
+        "segundos": segundos,
+        "ms_por_grafico": 1000 * segundos / max(graficos, 1),
+        "rss_inicial_mb": rss_inicial,
+        "rss_final_mb": memoria_residente_mb(),
+        "rss_maximo_mb": max([rss for _, rss in amostras_rss] + [rss_inicial]),
+        "amostras_rss": amostras_rss,
+        "falhas": len(falhas),
+        "cache": estatisticas_graficos(),
+    }
+
+# --- Exemplo de Uso ---
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Mede tempo e memória da renderização de gráficos.")
+    parser.add_argument("--graficos", type=int, default=2000, help="Número de gráficos distintos a renderizar")
+    parser.add_argument("--threads", type=int, default=1, help="Threads renderizando ao mesmo tempo (simula sessões)")
+    parser.add_argument("--amostras", type=int, default=10, help="Medições de memória ao longo da execução")
+    parser.add_argument("--sem-logo", action="store_true", help="Renderiza sem a marca d'água")
+    args = parser.parse_args()
+
+    resultado = medir_renderizacao(args.graficos, args.threads, args.amostras, None if args.sem_logo else LOGO_PATH)
+    print(f"{resultado['graficos']} gráficos em {resultado['segundos']:.1f}s ({resultado['ms_por_grafico']:.1f} ms/gráfico, {resultado['threads']} threads)")
+    print("\nMemória residente (RSS):")
+    print(f"  {'início':>8}  {resultado['rss_inicial_mb']:8.1f} MB")
+    for feitos, rss in resultado["amostras_rss"]:
+        print(f"  {feitos:>8}  {rss:8.1f} MB")
+    print(f"\nVariação: {resultado['rss_final_mb'] - resultado['rss_inicial_mb']:+.1f} MB (máximo {resultado['rss_maximo_mb']:.1f} MB)")
+    cache = resultado["cache"]
+    print(f"Cache de gráficos: {cache['entradas']} entradas, {cache['memoria_bytes'] / (1024*1024):.1f} de {cache['limite_bytes'] / (1024*1024):.0f} MB")
+    if resultado["falhas"]:
+        print(f"Falhas: {resultado['falhas']} gráficos não foram gerados")
@@ -1,20 +1,145 @@
+import hashlib
 import io
-import matplotlib.pyplot as plt
+import json
+import threading
+from collections import OrderedDict
+import matplotlib
 import matplotlib.ticker as mticker
+from matplotlib.artist import setp
+from matplotlib.backends.backend_agg import FigureCanvasAgg
+from matplotlib.colors import to_hex
+from matplotlib.figure import Figure
+from matplotlib.image import imread
 import os
+import pandas as pd
+import plotly.graph_objects as go
+
+# --- Documentação do Código ---
+# Os gráficos são desenhados com a API orientada a objetos do Matplotlib (Figure + FigureCanvasAgg),
+# sem o estado global do pyplot: cada figura pertence só à chamada que a criou e é liberada ao fim
+# dela. O Matplotlib não é thread-safe, então as sessões do Streamlit renderizam uma de cada vez
+# (semáforo); os PNGs prontos ficam em um cache LRU limitado em número e em bytes.
+
+# Número máximo de gráficos (PNG já codificados) mantidos em memória, e o total de bytes que podem ocupar
+MAX_GRAFICOS_CACHE = 64
+LIMITE_MEMORIA_GRAFICOS = 16 * 1024 * 1024
+
+# Formato dos gráficos das respostas do chat: "png" (Matplotlib, renderizado no servidor) ou "plotly"
+# (especificação da figura, desenhada no navegador)
+FORMATO_GRAFICOS_CHAT = os.environ.get("FORMATO_GRAFICOS_CHAT", "png").lower()
+
+# Renderizações simultâneas; cada uma mantém uma figura e seu buffer Agg (~2 MB) em memória
+RENDERIZACOES_SIMULTANEAS = 1
+
+_graficos = OrderedDict()
+_memoria_graficos = 0
+_estatisticas_graficos = {"acertos": 0, "renderizacoes": 0}
+_logos = {}
+_lock_graficos = threading.Lock()
+_semaforo_renderizacao = threading.BoundedSemaphore(RENDERIZACOES_SIMULTANEAS)
+
+def _nova_figura(figsize):
+    """Cria uma figura ligada a um canvas Agg próprio, fora do gerenciador de figuras do pyplot"""
+    fig = Figure(figsize=figsize)
+    FigureCanvasAgg(fig)
+    return fig
+
+def _carregar_logo(logo_path):
+    """Decodifica a imagem da marca d'água uma única vez (de novo só se o arquivo mudar)"""
+    if not logo_path or not os.path.exists(logo_path): return None, None
+    caminho = os.path.abspath(logo_path)
+    versao = (caminho, os.stat(caminho).st_mtime_ns)
+    logo_img = _logos.get(versao)
+    if logo_img is not None:
+        return logo_img, versao
+    with _lock_graficos:
+        logo_img = _logos.get(versao) # Outra thread pode tê-la carregado enquanto esta esperava
+        if logo_img is None:
+            logo_img = imread(caminho)
+            logo_img.setflags(write=False)
+            _logos.clear()
+            _logos[versao] = logo_img
+    return logo_img, versao
+
+def _chave_grafico(tipo, dados, *estilo):
+    """Hash dos dados, do tipo de gráfico e do estilo (textos e marca d'água) de um gráfico"""
+    hasher = hashlib.sha256(tipo.encode())
+    if isinstance(dados, pd.DataFrame):
+        hasher.update(pd.util.hash_pandas_object(dados, index=False).to_numpy().tobytes())
+        hasher.update(repr(list(dados.columns)).encode())
+    else:
+        hasher.update(json.dumps(dados, sort_keys=True, default=str).encode())
+    hasher.update(repr(estilo).encode())
+    return hasher.hexdigest()
+
+def _buscar_grafico(chave):
+    """PNG do gráfico em cache, ou None (chamar sem o lock)"""
+    with _lock_graficos:
+        png = _graficos.get(chave)
+        if png is not None:
+            _graficos.move_to_end(chave)
+            _estatisticas_graficos["acertos"] += 1
+        return png
+
+def _grafico_em_cache(chave, renderizar):
+    """Retorna um BytesIO novo com o PNG do gráfico, renderizando-o só se não estiver em cache"""
+    global _memoria_graficos
+    png = _buscar_grafico(chave)
+    if png is not None: return io.BytesIO(png)
+    with _semaforo_renderizacao:
+        # Outra sessão pode ter renderizado o mesmo gráfico enquanto esta esperava
+        png = _buscar_grafico(chave)
+        if png is not None: return io.BytesIO(png)
+        png = renderizar()
+    if png is None: return None
+    with _lock_graficos:
+        _estatisticas_graficos["renderizacoes"] += 1
+        if chave not in _graficos and len(png) <= LIMITE_MEMORIA_GRAFICOS:
+            _graficos[chave] = png
+            _memoria_graficos += len(png)
+        while _graficos and (len(_graficos) > MAX_GRAFICOS_CACHE or _memoria_graficos > LIMITE_MEMORIA_GRAFICOS):
+            _, removido = _graficos.popitem(last=False)
+            _memoria_graficos -= len(removido)
+    return io.BytesIO(png)
+
+def estatisticas_graficos():
+    """Retorna os acertos e renderizações do cache de gráficos e sua ocupação atual"""
+    with _lock_graficos:
+        return {**_estatisticas_graficos, "entradas": len(_graficos), "memoria_bytes": _memoria_graficos, "limite_bytes": LIMITE_MEMORIA_GRAFICOS}
+
+def limpar_cache_graficos():
+    """Remove os gráficos e a marca d'água guardados em memória e zera os contadores"""
+    global _memoria_graficos
+    with _lock_graficos:
+        _graficos.clear()
+        _logos.clear()
+        _memoria_graficos = 0
+        for nome in _estatisticas_graficos:
+            _estatisticas_graficos[nome] = 0
 
 def gerar_grafico_market_share(share_data, logo_path=None):
-    """Gera um gráfico de pizza para visualização do market share"""
+    """Gera um gráfico de pizza para visualização do market share (PNG em cache pelos dados)"""
+    try:
+        logo_img, versao_logo = _carregar_logo(logo_path)
+        chave = _chave_grafico("market_share", share_data, versao_logo)
+        return _grafico_em_cache(chave, lambda: _renderizar_market_share(share_data, logo_img))
+    except Exception as e:
+        print(f"Erro ao gerar gráfico de market share: {e}")
+        return None
+
+def _renderizar_market_share(share_data, logo_img):
+    """Desenha o gráfico de market share e retorna os bytes do PNG"""
+    fig = None
     try:
         from utils.constants import operador_icao_para_nome
         labels = [operador_icao_para_nome.get(item['NR_AERONAVE_OPERADOR'], item['NR_AERONAVE_OPERADOR']) for item in share_data]
         sizes = [item['PaxShare'] for item in share_data]
-        colors = plt.cm.Paired(range(len(labels)))
-        fig, ax = plt.subplots(figsize=(10, 6))
+        colors = matplotlib.colormaps['Paired'](range(len(labels)))
+        fig = _nova_figura((10, 6))
+        ax = fig.subplots()
         
         # Adiciona a marca d'água PRIMEIRO
-        if logo_path and os.path.exists(logo_path):
-            logo_img = plt.imread(logo_path)
+        if logo_img is not None:
             # Posição e tamanho da marca d'água no canto inferior direito
             logo_ax = fig.add_axes([0.65, 0.05, 0.3, 0.3], anchor='SE', zorder=0)
             logo_ax.imshow(logo_img)
@@ -38,28 +163,41 @@ def gerar_grafico_market_share(share_data, logo_path=None):
                   title="Operadores",
                   loc="center left",
                   bbox_to_anchor=(1, 0, 0.5, 1))
-        plt.setp(autotexts, size=8, weight="bold", color="white")
+        setp(autotexts, size=8, weight="bold", color="white")
         ax.set_title("Participação de Mercado por Passageiros", pad=20)
         
         # Define o fundo do eixo como transparente para ver a marca d'água
         ax.patch.set_alpha(0.0)
 
         buf = io.BytesIO()
-        plt.savefig(buf, format='png', bbox_inches='tight', transparent=True)
-        buf.seek(0)
-        return buf
+        fig.savefig(buf, format='png', bbox_inches='tight', transparent=True)
+        return buf.getvalue()
     except Exception as e:
         print(f"Erro ao gerar gráfico de market share: {e}")
         return None
+    finally:
+        if fig is not None: fig.clear() # Libera os artistas e o buffer Agg já na saída
 
 def gerar_grafico_historico(df_historico, tipo_consulta, local, logo_path=None):
-    """Gera um gráfico de linha para visualização do histórico de movimentação"""
+    """Gera um gráfico de linha para visualização do histórico de movimentação (PNG em cache pelos dados)"""
+    try:
+        logo_img, versao_logo = _carregar_logo(logo_path)
+        dados = df_historico[['ANO', 'TotalValor']]
+        chave = _chave_grafico("historico", dados, tipo_consulta, local, versao_logo)
+        return _grafico_em_cache(chave, lambda: _renderizar_historico(dados, tipo_consulta, local, logo_img))
+    except Exception as e:
+        print(f"Erro ao gerar gráfico de histórico: {e}")
+        return None
+
+def _renderizar_historico(df_historico, tipo_consulta, local, logo_img):
+    """Desenha o gráfico de histórico e retorna os bytes do PNG"""
+    fig = None
     try:
-        fig, ax = plt.subplots(figsize=(10, 6))
+        fig = _nova_figura((10, 6))
+        ax = fig.subplots()
         
         # Adiciona a marca d'água PRIMEIRO
-        if logo_path and os.path.exists(logo_path):
-            logo_img = plt.imread(logo_path)
+        if logo_img is not None:
             fig_width, fig_height = fig.get_size_inches() * fig.dpi
             logo_width, logo_height = logo_img.shape[1], logo_img.shape[0]
             x_pos = (fig_width - logo_width) / 2
@@ -68,11 +206,9 @@ def gerar_grafico_historico(df_historico, tipo_consulta, local, logo_path=None):
             
         ax.plot(df_historico['ANO'], df_historico['TotalValor'], marker='o', linestyle='-', color='b')
         ax.grid(True, which='both', linestyle='--', linewidth=0.5)
-        ax.set_title(f'Evolução Anual de {tipo_consulta.capitalize()} - {local.title()}', fontsize=16, pad=20)
+        titulo, ylabel = _titulo_historico(tipo_consulta, local)
+        ax.set_title(titulo, fontsize=16, pad=20)
         ax.set_xlabel('Ano', fontsize=12)
-        ylabel = f'Total de {tipo_consulta.capitalize()}'
-        if tipo_consulta == 'cargas':
-            ylabel += ' (kg)'
         ax.set_ylabel(ylabel, fontsize=12)
         formatter = mticker.FuncFormatter(lambda x, p: format(int(x), ','))
         ax.yaxis.set_major_formatter(formatter)
@@ -81,11 +217,58 @@ def gerar_grafico_historico(df_historico, tipo_consulta, local, logo_path=None):
         # Define o fundo do eixo como transparente
         ax.patch.set_alpha(0.0)
         
-        plt.tight_layout()
+        fig.tight_layout()
         buf = io.BytesIO()
-        plt.savefig(buf, format='png', transparent=True)
-        buf.seek(0)
-        return buf
+        fig.savefig(buf, format='png', transparent=True)
+        return buf.getvalue()
+    except Exception as e:
+        print(f"Erro ao gerar gráfico de histórico: {e}")
+        return None
+    finally:
+        if fig is not None: fig.clear() # Libera os artistas e o buffer Agg já na saída
+
+def _titulo_historico(tipo_consulta, local):
+    """Título e rótulo do eixo Y do gráfico de histórico (iguais nas versões PNG e Plotly)"""
+    ylabel = f'Total de {tipo_consulta.capitalize()}'
+    if tipo_consulta == 'cargas':
+        ylabel += ' (kg)'
+    return f'Evolução Anual de {tipo_consulta.capitalize()} - {local.title()}', ylabel
+
+def gerar_figura_market_share(share_data):
+    """Gera o gráfico de market share como figura Plotly, desenhada no navegador"""
+    try:
+        from utils.constants import operador_icao_para_nome
+        labels = [operador_icao_para_nome.get(item['NR_AERONAVE_OPERADOR'], item['NR_AERONAVE_OPERADOR']) for item in share_data]
+        cores = [to_hex(cor) for cor in matplotlib.colormaps['Paired'](range(len(labels)))]
+        fig = go.Figure(go.Pie(
+            labels=labels,
+            values=[item['PaxShare'] for item in share_data],
+            hole=0.5,
+            sort=False,
+            direction='counterclockwise',
+            texttemplate='%{percent:.1%}',
+            marker=dict(colors=cores, line=dict(color='white', width=1)),
+        ))
+        fig.update_layout(title="Participação de Mercado por Passageiros", legend_title_text="Operadores", height=450)
+        return fig
+    except Exception as e:
+        print(f"Erro ao gerar gráfico de market share: {e}")
+        return None
+
+def gerar_figura_historico(df_historico, tipo_consulta, local):
+    """Gera o gráfico de histórico de movimentação como figura Plotly, desenhada no navegador"""
+    try:
+        titulo, ylabel = _titulo_historico(tipo_consulta, local)
+        fig = go.Figure(go.Scatter(
+            x=df_historico['ANO'].tolist(),
+            y=df_historico['TotalValor'].tolist(),
+            mode='lines+markers',
+            line=dict(color='blue'),
+        ))
+        fig.update_layout(title=titulo, xaxis_title='Ano', yaxis_title=ylabel, height=450)
+        fig.update_xaxes(dtick=1, showgrid=True, griddash='dash')
+        fig.update_yaxes(tickformat=',d', showgrid=True, griddash='dash')
+        return fig
     except Exception as e:
         print(f"Erro ao gerar gráfico de histórico: {e}")
-        return None 
\ No newline at end of file
+        return None
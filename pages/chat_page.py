@@ -1,41 +1,48 @@
 
 import streamlit as st
 import pandas as pd
+import plotly.graph_objects as go
 import random
 import streamlit.components.v1 as components
-import base64
 import os
 from streamlit_mic_recorder import mic_recorder
 
 from chatbot_logic import (
     parse_pergunta_com_llm,
-    consultar_movimentacoes_aeroportuarias,
-    obter_aeroporto_mais_movimentado,
-    obter_aeroporto_mais_voos_internacionais,
-    obter_operador_mais_passageiros,
-    obter_operador_mais_cargas,
-    obter_principal_destino,
     formatar_numero_br,
     aeroporto_nome_para_icao,
     mes_numero_para_nome,
     operador_icao_para_nome,
-    obter_operador_maiores_atrasos,
-    calcular_market_share,
-    obter_top_10_aeroportos,
     gerar_grafico_market_share,
-    obter_historico_movimentacao,
     gerar_grafico_historico,
+    gerar_figura_market_share,
+    gerar_figura_historico,
+    FORMATO_GRAFICOS_CHAT,
     reescrever_resposta_com_llm,
     transcrever_audio
 )
+# Consultas com cache compartilhado entre as sessões (queries.cache)
+from queries.database import consultar_movimentacoes_aeroportuarias, obter_historico_movimentacao
+from queries.rankings import (
+    obter_aeroporto_mais_movimentado,
+    obter_aeroporto_mais_voos_internacionais,
+    obter_operador_mais_passageiros,
+    obter_operador_mais_cargas,
+    obter_principal_destino,
+    obter_operador_maiores_atrasos,
+    calcular_market_share,
+    obter_top_10_aeroportos
+)
 
 from database_logic import save_conversation
+from utils.assets import src_imagem
 
-def get_image_as_base64(path):
-    if not os.path.exists(path):
-        return None
-    with open(path, "rb") as img_file:
-        return base64.b64encode(img_file.read()).decode()
+def exibir_grafico(grafico, key):
+    """Exibe o gráfico de uma resposta: figura Plotly (desenhada no navegador) ou imagem PNG"""
+    if isinstance(grafico, go.Figure):
+        st.plotly_chart(grafico, use_container_width=True, key=key)
+    else:
+        st.image(grafico, use_container_width=True)
 
 def render(PASTA_ARQUIVOS_PARQUET, ultimo_ano, LOGO_PATH, ICON_PATH):
     # Define LOGO_WATERMARK_PATH for use in chart generation
@@ -49,12 +56,12 @@ def render(PASTA_ARQUIVOS_PARQUET, ultimo_ano, LOGO_PATH, ICON_PATH):
             st.image(LOGO_PATH, width=300)
     
     # Título e Descrição
-    icon_base64 = get_image_as_base64(ICON_PATH)
-    if icon_base64:
+    icon_src = src_imagem(ICON_PATH)
+    if icon_src:
         st.markdown(
             f"""
             <div style="display: flex; align-items: center; justify-content: center; margin-bottom: 20px;">
-                <img src="data:image/gif;base64,{icon_base64}" style="max-width: 100px; margin-right: 20px;filter: grayscale(0.6);">
+                <img src="{icon_src}" style="max-width: 100px; margin-right: 20px;filter: grayscale(0.6);">
                 <h1 style="margin: 0px;color: #595a5c;">Chatbot de Movimentações Aeroportuárias</h1>
             </div>
             """,
@@ -132,13 +139,13 @@ def render(PASTA_ARQUIVOS_PARQUET, ultimo_ano, LOGO_PATH, ICON_PATH):
 
     # Interface do Chat
     if "messages" not in st.session_state: st.session_state.messages = []
-    for message in st.session_state.messages:
+    for i, message in enumerate(st.session_state.messages):
         with st.chat_message(message["role"]):
             if isinstance(message["content"], tuple):
                 text_content, image_content = message["content"]
                 st.markdown(text_content)
                 if image_content:
-                    st.image(image_content, use_container_width=True)
+                    exibir_grafico(image_content, key=f"grafico_chat_{i}")
             else:
                 st.markdown(message["content"])
 
@@ -178,7 +185,10 @@ def render(PASTA_ARQUIVOS_PARQUET, ultimo_ano, LOGO_PATH, ICON_PATH):
                             for _, row in df_historico.iterrows():
                                 dados_texto.append(f"- Ano {row['ANO']}: {formatar_numero_br(row['TotalValor'])}")
                             resposta_chatbot_texto = f"Dados da evolução de {tipo_consulta} para **{local}**:\n" + "\n".join(dados_texto)
-                            resposta_chatbot_imagem = gerar_grafico_historico(df_historico, tipo_consulta, local, logo_path=LOGO_WATERMARK_PATH)
+                            if FORMATO_GRAFICOS_CHAT == "plotly":
+                                resposta_chatbot_imagem = gerar_figura_historico(df_historico, tipo_consulta, local)
+                            else:
+                                resposta_chatbot_imagem = gerar_grafico_historico(df_historico, tipo_consulta, local, logo_path=LOGO_WATERMARK_PATH)
                         else:
                             resposta_chatbot_texto = f"Não encontrei dados para gerar o histórico de {tipo_consulta} para **{local}**."
                     elif parametros.get('intencao_market_share'):
@@ -199,7 +209,10 @@ def render(PASTA_ARQUIVOS_PARQUET, ultimo_ano, LOGO_PATH, ICON_PATH):
                                 nome_operador = operador_icao_para_nome.get(op['NR_AERONAVE_OPERADOR'], op['NR_AERONAVE_OPERADOR'])
                                 lista_operadores.append(f"- **{nome_operador}**: {op['VooShare']:.1f}% dos voos e {op['PaxShare']:.1f}% dos passageiros.")
                             resposta_chatbot_texto += "\n".join(lista_operadores)
-                            resposta_chatbot_imagem = gerar_grafico_market_share(resultado_share['data'], logo_path=LOGO_WATERMARK_PATH)
+                            if FORMATO_GRAFICOS_CHAT == "plotly":
+                                resposta_chatbot_imagem = gerar_figura_market_share(resultado_share['data'])
+                            else:
+                                resposta_chatbot_imagem = gerar_grafico_market_share(resultado_share['data'], logo_path=LOGO_WATERMARK_PATH)
                     elif parametros.get('intencao_mais_movimentado'):
                         resultado_ranking = obter_aeroporto_mais_movimentado(PASTA_ARQUIVOS_PARQUET, ano=parametros.get('ano'))
                         if resultado_ranking:
@@ -313,7 +326,7 @@ def render(PASTA_ARQUIVOS_PARQUET, ultimo_ano, LOGO_PATH, ICON_PATH):
                     resposta_final = reescrever_resposta_com_llm(prompt, resposta_chatbot_texto)
                     st.markdown(resposta_final)
                     if resposta_chatbot_imagem:
-                        st.image(resposta_chatbot_imagem, use_container_width=True)
+                        exibir_grafico(resposta_chatbot_imagem, key=f"grafico_chat_{len(st.session_state.messages)}")
                     
                     content_to_save = (resposta_final, resposta_chatbot_imagem) if resposta_chatbot_imagem else resposta_final
                     st.session_state.messages.append({"role": "assistant", "content": content_to_save})
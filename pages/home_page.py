@@ -1,16 +1,10 @@
 
 import streamlit as st
-import base64
 import os
 from streamlit_card import card
+from utils.assets import src_imagem
 
 
-def get_image_as_base64(path):
-    if not os.path.exists(path):
-        return None
-    with open(path, "rb") as img_file:
-        return base64.b64encode(img_file.read()).decode()
-
 def render(PASTA_ARQUIVOS_PARQUET, ultimo_ano, LOGO_PATH, ICON_PATH):
     
     # Define LOGO_WATERMARK_PATH for use in chart generation
@@ -45,12 +39,12 @@ def render(PASTA_ARQUIVOS_PARQUET, ultimo_ano, LOGO_PATH, ICON_PATH):
     """, unsafe_allow_html=True)
 
     # Seção de boas-vindas
-    icon_base64 = get_image_as_base64(ICON_PATH)
-    if icon_base64:
+    icon_src = src_imagem(ICON_PATH)
+    if icon_src:
         st.markdown(
             f"""
             <div style="display: flex; align-items: center; justify-content: center; margin-bottom: 20px;">
-                <img src="data:image/gif;base64,{icon_base64}" style="max-width: 100px; margin-right: 20px;filter: grayscale(0.6);">
+                <img src="{icon_src}" style="max-width: 100px; margin-right: 20px;filter: grayscale(0.6);">
                 <h1 style="margin: 0px;color: #595a5c;">Observatório de Dados Aeroportuários</h1>
             </div>
             """,
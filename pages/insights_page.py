@@ -4,34 +4,24 @@ import pandas as pd
 import plotly.express as px
 import plotly.graph_objects as go
 from datetime import datetime, timedelta
-import os
-import base64
 
 from analytics.insights_ai import generate_automated_insights, generate_market_insights, generate_seasonal_insights
+from queries.rankings import obter_aeroporto_mais_movimentado, obter_resumo_ano, calcular_market_share
 from chatbot_logic import (
-    obter_aeroporto_mais_movimentado,
-    obter_operador_mais_passageiros,
-    obter_top_10_aeroportos,
-    calcular_market_share,
     formatar_numero_br,
     aeroporto_nome_para_icao,
     operador_icao_para_nome
 )
+from utils.assets import src_imagem
 
-def get_image_as_base64(path):
-    if not os.path.exists(path):
-        return None
-    with open(path, "rb") as img_file:
-        return base64.b64encode(img_file.read()).decode()
-        
 def render(PASTA_ARQUIVOS_PARQUET, ultimo_ano, LOGO_PATH, ICON_PATH):
     # Título e Descrição
-    icon_base64 = get_image_as_base64(ICON_PATH)
-    if icon_base64:
+    icon_src = src_imagem(ICON_PATH)
+    if icon_src:
         st.markdown(
             f"""
             <div style="display: flex; align-items: center; justify-content: center; margin-bottom: 20px;">
-                <img src="data:image/gif;base64,{icon_base64}" style="max-width: 100px; margin-right: 20px;filter: grayscale(0.6);">
+                <img src="{icon_src}" style="max-width: 100px; margin-right: 20px;filter: grayscale(0.6);">
                 <h1 style="margin: 0px;color: #595a5c;">Insights Automáticos com IA</h1>
             </div>
             """,
@@ -78,8 +68,11 @@ def render_general_insights(PASTA_ARQUIVOS_PARQUET, ultimo_ano):
     # Métricas principais
     col1, col2, col3, col4 = st.columns(4)
     
+    # Todos os destaques do ano vêm de uma única consulta
+    resumo = obter_resumo_ano(PASTA_ARQUIVOS_PARQUET, ano=ultimo_ano) or {}
+    
     # Aeroporto mais movimentado
-    resultado_movimentado = obter_aeroporto_mais_movimentado(PASTA_ARQUIVOS_PARQUET, ano=ultimo_ano)
+    resultado_movimentado = resumo.get('aeroporto_mais_movimentado')
     if resultado_movimentado:
         aeroporto_nome = next((nome.title() for nome, icao in aeroporto_nome_para_icao.items() 
                               if icao == resultado_movimentado['aeroporto'].upper()), 
@@ -93,7 +86,7 @@ def render_general_insights(PASTA_ARQUIVOS_PARQUET, ultimo_ano):
             )
     
     # Operador líder
-    resultado_operador = obter_operador_mais_passageiros(PASTA_ARQUIVOS_PARQUET, ano=ultimo_ano)
+    resultado_operador = resumo.get('operador_mais_passageiros')
     if resultado_operador:
         operador_nome = operador_icao_para_nome.get(resultado_operador['operador'].upper(), 
                                                    resultado_operador['operador'])
@@ -106,7 +99,7 @@ def render_general_insights(PASTA_ARQUIVOS_PARQUET, ultimo_ano):
             )
     
     # Total de aeroportos ativos
-    top_aeroportos = obter_top_10_aeroportos(PASTA_ARQUIVOS_PARQUET, ano=ultimo_ano)
+    top_aeroportos = resumo.get('top_aeroportos', [])
     with col3:
         st.metric(
             "Aeroportos Ativos",
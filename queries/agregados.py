@@ -0,0 +1,142 @@
+import os
+from queries.catalog import listar_arquivos_parquet, obter_view, obter_view_auxiliar, sql_leitura_dataset
+from queries.connection import obter_conexao
+from queries.statements import literal_sql
+
+# Movimentos com mais minutos de atraso que isso contam como atrasados na taxa de pontualidade
+MINUTOS_TOLERANCIA_ATRASO = 15
+
+# Medidas calculadas sobre as movimentações brutas
+MEDIDAS_BRUTAS = {
+    "passageiros": "SUM(QT_PAX_TOTAL)",
+    "carga": "SUM(QT_CARGA)",
+    "voos": "COUNT(*)",
+    "atraso": "SUM(CASE WHEN MIN_ATRASO > 0 THEN MIN_ATRASO ELSE 0 END)",
+    "atrasados": f"COUNT(*) FILTER (WHERE MIN_ATRASO > {MINUTOS_TOLERANCIA_ATRASO})",
+    "com_horario": "COUNT(MIN_ATRASO)",
+    "atraso_maximo": "MAX(MIN_ATRASO)",
+}
+
+# Tabelas pré-agregadas geradas na ingestão, da menor para a maior. Cada uma fica em uma
+# subpasta da pasta Parquet, com um arquivo por arquivo de dados de mesmo nome.
+AGREGADOS = {
+    "rollup": {
+        "subpasta": "_rollup",
+        "dimensoes": ["ANO", "MES", "NR_AEROPORTO_REFERENCIA", "NR_AERONAVE_OPERADOR", "NR_NATUREZA", "NR_MOVIMENTO_TIPO"],
+        "colunas": {
+            "QT_PAX": "SUM(QT_PAX_TOTAL)",
+            "QT_CARGA": "SUM(QT_CARGA)",
+            "QT_VOOS": "COUNT(*)",
+        },
+        "medidas": {
+            "passageiros": "SUM(QT_PAX)",
+            "carga": "SUM(QT_CARGA)",
+            "voos": "SUM(QT_VOOS)",
+        },
+    },
+    "atrasos": {
+        "subpasta": "_atrasos",
+        "dimensoes": ["ANO", "MES", "NR_AEROPORTO_REFERENCIA", "NR_AERONAVE_OPERADOR", "NR_MOVIMENTO_TIPO"],
+        "colunas": {
+            "QT_COM_HORARIO": MEDIDAS_BRUTAS["com_horario"],
+            "QT_ATRASADOS": MEDIDAS_BRUTAS["atrasados"],
+            "MIN_ATRASO_TOTAL": MEDIDAS_BRUTAS["atraso"],
+            "MIN_ATRASO_MAXIMO": MEDIDAS_BRUTAS["atraso_maximo"],
+        },
+        "medidas": {
+            "atraso": "SUM(MIN_ATRASO_TOTAL)",
+            "atrasados": "SUM(QT_ATRASADOS)",
+            "com_horario": "SUM(QT_COM_HORARIO)",
+            "atraso_maximo": "MAX(MIN_ATRASO_MAXIMO)",
+        },
+    },
+    "od": {
+        "subpasta": "_od",
+        "dimensoes": ["ANO", "MES", "NR_AEROPORTO_REFERENCIA", "NR_MOVIMENTO_TIPO", "NR_NATUREZA", "NR_VOO_OUTRO_AEROPORTO"],
+        "colunas": {
+            "QT_PAX": "SUM(QT_PAX_TOTAL)",
+            "QT_CARGA": "SUM(QT_CARGA)",
+            "QT_VOOS": "COUNT(*)",
+        },
+        "medidas": {
+            "passageiros": "SUM(QT_PAX)",
+            "carga": "SUM(QT_CARGA)",
+            "voos": "SUM(QT_VOOS)",
+        },
+    },
+}
+
+def escolher_fonte(pasta_parquet, colunas, medidas):
+    """Escolhe a fonte mais barata capaz de responder à consulta.
+
+    Usa a primeira tabela agregada que contenha todas as `colunas` (filtros e agrupamentos)
+    e todas as `medidas` e que esteja atualizada para o dataset; caso contrário, recorre
+    aos dados brutos. Retorna a view e o dicionário {medida: expressão SQL}, ou (None, None)
+    se não houver dados.
+    """
+    for agregado in AGREGADOS.values():
+        if not set(colunas) <= set(agregado["dimensoes"]): continue
+        if not all(medida in agregado["medidas"] for medida in medidas): continue
+        view = obter_view_auxiliar(pasta_parquet, agregado["subpasta"])
+        if view:
+            return view, {medida: agregado["medidas"][medida] for medida in medidas}
+    view = obter_view(pasta_parquet)
+    if not view: return None, None
+    return view, {medida: MEDIDAS_BRUTAS[medida] for medida in medidas}
+
+def _construir_agregado(pasta_parquet, agregado, nome_arquivo, arquivos_dados):
+    """Gera o arquivo da tabela agregada correspondente a um arquivo de dados"""
+    pasta_agregado = os.path.join(pasta_parquet, agregado["subpasta"])
+    os.makedirs(pasta_agregado, exist_ok=True)
+    caminho = os.path.join(pasta_agregado, nome_arquivo)
+    caminho_temporario = caminho + ".tmp"
+    dimensoes = ", ".join(agregado["dimensoes"])
+    colunas = ", ".join(f"{expressao} AS {nome}" for nome, expressao in agregado["colunas"].items())
+    consulta = f"""
+    SELECT {dimensoes}, {colunas}
+    FROM ({sql_leitura_dataset(pasta_parquet, arquivos_dados)})
+    GROUP BY {dimensoes}
+    ORDER BY {dimensoes}
+    """
+    obter_conexao().execute(f"COPY ({consulta}) TO {literal_sql(caminho_temporario)} (FORMAT parquet, COMPRESSION zstd)")
+    os.replace(caminho_temporario, caminho) # Publica o arquivo completo de uma vez
+    return caminho
+
+def construir_agregados(pasta_parquet, nomes_arquivos=None, forcar=False):
+    """
+    Gera as tabelas agregadas para os arquivos de dados da pasta Parquet.
+
+    Args:
+        pasta_parquet (str): A pasta do dataset.
+        nomes_arquivos (list): Nomes dos arquivos de dados (ex.: 'Movimentacoes_Aeroportuarias_202401.parquet')
+            a processar. Se None, processa todos.
+        forcar (bool): Se False, só gera os agregados ausentes ou mais antigos que os dados.
+
+    Returns:
+        list: Os caminhos dos arquivos agregados gerados.
+    """
+    pasta_parquet = os.path.abspath(pasta_parquet)
+    arquivos_por_nome = {}
+    for caminho in listar_arquivos_parquet(pasta_parquet):
+        arquivos_por_nome.setdefault(os.path.basename(caminho), []).append(caminho)
+    if nomes_arquivos is not None:
+        arquivos_por_nome = {nome: arquivos for nome, arquivos in arquivos_por_nome.items() if nome in nomes_arquivos}
+
+    gerados = []
+    for agregado in AGREGADOS.values():
+        pasta_agregado = os.path.join(pasta_parquet, agregado["subpasta"])
+        for nome_arquivo, arquivos_dados in sorted(arquivos_por_nome.items()):
+            caminho = os.path.join(pasta_agregado, nome_arquivo)
+            if not forcar and os.path.exists(caminho):
+                if os.path.getmtime(caminho) >= max(os.path.getmtime(arquivo) for arquivo in arquivos_dados):
+                    continue
+            try:
+                gerados.append(_construir_agregado(pasta_parquet, agregado, nome_arquivo, arquivos_dados))
+            except Exception as e:
+                print(f"DEBUG: Erro ao gerar o agregado '{agregado['subpasta']}' de {nome_arquivo}: {e}")
+        # Remove agregados de arquivos que não existem mais, que impediriam o uso da tabela
+        if nomes_arquivos is None and os.path.isdir(pasta_agregado):
+            for nome_arquivo in os.listdir(pasta_agregado):
+                if nome_arquivo.endswith('.parquet') and nome_arquivo not in arquivos_por_nome:
+                    os.remove(os.path.join(pasta_agregado, nome_arquivo))
+    return gerados
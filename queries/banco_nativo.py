@@ -0,0 +1,38 @@
+import os
+import duckdb
+from queries.catalog import (ARQUIVO_BANCO_NATIVO, TABELA_NATIVA, TABELA_VERSAO_NATIVA, listar_arquivos_parquet,
+                             calcular_versao_dataset, impressao_relativa, sql_leitura_dataset)
+
+# Ordem das linhas na tabela nativa. Os zone maps do DuckDB (mín./máx. de cada bloco de linhas)
+# só descartam blocos nos filtros de período e aeroporto se as linhas estiverem agrupadas por eles.
+ORDEM_TABELA_NATIVA = ["ANO", "MES", "NR_AEROPORTO_REFERENCIA", "NR_AERONAVE_OPERADOR"]
+
+def carregar_banco_nativo(pasta_parquet):
+    """
+    Carrega os arquivos Parquet ativos da pasta em uma tabela nativa do banco '_banco.duckdb'.
+
+    O banco é gerado em um arquivo temporário e publicado com os.replace; com BACKEND_DADOS = "duckdb",
+    os aplicativos abertos passam a usá-lo na próxima verificação da pasta. Se os arquivos Parquet
+    mudarem depois da carga, as consultas voltam a lê-los até que o banco seja carregado de novo.
+
+    Returns:
+        str: O caminho do banco gerado, ou None se não houver dados.
+    """
+    pasta_parquet = os.path.abspath(pasta_parquet)
+    versao = calcular_versao_dataset(listar_arquivos_parquet(pasta_parquet))
+    if not versao: return None
+    caminho = os.path.join(pasta_parquet, ARQUIVO_BANCO_NATIVO)
+    caminho_temporario = caminho + ".tmp"
+    for resto in (caminho_temporario, caminho_temporario + ".wal"):
+        if os.path.exists(resto): os.remove(resto)
+
+    con = duckdb.connect(caminho_temporario)
+    try:
+        leitura = sql_leitura_dataset(pasta_parquet, [arquivo for arquivo, _, _ in versao])
+        con.execute(f"CREATE TABLE {TABELA_NATIVA} AS SELECT * FROM ({leitura}) ORDER BY {', '.join(ORDEM_TABELA_NATIVA)}")
+        con.execute(f"CREATE TABLE {TABELA_VERSAO_NATIVA} AS SELECT ? AS impressao", [impressao_relativa(pasta_parquet, versao)])
+        con.execute("CHECKPOINT")
+    finally:
+        con.close()
+    os.replace(caminho_temporario, caminho) # Publica o banco completo de uma vez
+    return caminho
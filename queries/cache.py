@@ -0,0 +1,156 @@
+import copy
+import functools
+import inspect
+import os
+import sys
+import threading
+import time
+from collections import Counter, OrderedDict
+import pandas as pd
+from queries.catalog import obter_impressao_dataset
+
+# Memória máxima (estimada) ocupada pelos resultados em cache
+LIMITE_MEMORIA_CACHE = 64 * 1024 * 1024
+
+# Segundos que um resultado permanece em cache (0 = sem expiração)
+TTL_CACHE_DADOS = int(os.environ.get("TTL_CACHE_DADOS", 3600))
+
+# Número máximo de resultados guardados por consulta (0 = sem limite)
+MAX_ENTRADAS_CACHE_DADOS = int(os.environ.get("MAX_ENTRADAS_CACHE_DADOS", 256))
+
+# Parâmetros com códigos (ICAO, tipo de movimento, natureza) que as consultas comparam em maiúsculas
+PARAMETROS_CODIGO = {"aeroporto", "aeroporto_origem", "tipo_movimento", "natureza"}
+
+# Parâmetros numéricos que podem chegar como texto (ex.: '2021' vindo da interface)
+PARAMETROS_NUMERICOS = {"ano", "mes", "n"}
+
+_entradas = OrderedDict() # chave -> (resultado, tamanho, expira_em)
+_entradas_por_funcao = Counter()
+_memoria_em_uso = 0
+_estatisticas = {"acertos": 0, "falhas": 0, "remocoes": 0}
+_lock_cache = threading.Lock()
+
+def _tamanho_estimado(valor):
+    """Estima, em bytes, a memória ocupada por um resultado"""
+    if isinstance(valor, pd.DataFrame):
+        return int(valor.memory_usage(deep=True).sum())
+    if isinstance(valor, dict):
+        return sys.getsizeof(valor) + sum(_tamanho_estimado(k) + _tamanho_estimado(v) for k, v in valor.items())
+    if isinstance(valor, (list, tuple)):
+        return sys.getsizeof(valor) + sum(_tamanho_estimado(item) for item in valor)
+    return sys.getsizeof(valor)
+
+def _copiar(valor):
+    """Copia o resultado para que quem o recebe não altere a entrada em cache"""
+    if isinstance(valor, pd.DataFrame): return valor.copy()
+    return copy.deepcopy(valor)
+
+def _normalizar(nome, valor):
+    """Normaliza um argumento para que chamadas equivalentes compartilhem a mesma entrada"""
+    if nome == "pasta_parquet": return os.path.abspath(valor)
+    if nome in PARAMETROS_CODIGO and isinstance(valor, str): return valor.upper() or None
+    if nome in PARAMETROS_NUMERICOS and isinstance(valor, str) and valor.strip().isdigit(): return int(valor)
+    return valor
+
+def _remover(chave):
+    """Remove uma entrada do cache (chamar com o lock)"""
+    global _memoria_em_uso
+    _, tamanho, _ = _entradas.pop(chave)
+    _memoria_em_uso -= tamanho
+    _entradas_por_funcao[chave[:2]] -= 1
+    _estatisticas["remocoes"] += 1
+
+def _remover_excedente(funcao=None):
+    """Remove as entradas menos usadas até respeitar o limite de memória e, se `funcao` for
+    informada, o limite de entradas dessa consulta (chamar com o lock)"""
+    while _memoria_em_uso > LIMITE_MEMORIA_CACHE and _entradas:
+        _remover(next(iter(_entradas)))
+    if funcao is None or not MAX_ENTRADAS_CACHE_DADOS: return
+    while _entradas_por_funcao[funcao] > MAX_ENTRADAS_CACHE_DADOS:
+        _remover(next(chave for chave in _entradas if chave[:2] == funcao))
+
+def em_cache(funcao):
+    """Decorador que guarda em cache os resultados de uma consulta à pasta Parquet.
+
+    A chave combina a função, os argumentos normalizados e a impressão digital do dataset,
+    de modo que as entradas deixam de valer assim que um arquivo é adicionado ou substituído.
+    Cada entrada expira após TTL_CACHE_DADOS segundos, e cada consulta guarda no máximo
+    MAX_ENTRADAS_CACHE_DADOS resultados (os menos usados saem primeiro).
+    A consulta recebe os mesmos argumentos normalizados da chave, para que o resultado (que pode
+    repetir os filtros) seja igual em um acerto e em uma falha, qualquer que seja a grafia usada.
+    Resultados vazios (None, listas ou DataFrames vazios) não são guardados.
+    """
+    assinatura = inspect.signature(funcao)
+
+    @functools.wraps(funcao)
+    def wrapper(*args, **kwargs):
+        argumentos = assinatura.bind(*args, **kwargs)
+        argumentos.apply_defaults()
+        pasta_parquet = argumentos.arguments.get("pasta_parquet")
+        impressao = obter_impressao_dataset(pasta_parquet) if pasta_parquet and os.path.exists(pasta_parquet) else None
+        if impressao is None:
+            return funcao(*args, **kwargs)
+        normalizados = {nome: _normalizar(nome, valor) for nome, valor in argumentos.arguments.items()}
+        try:
+            chave = (funcao.__module__, funcao.__qualname__, impressao,
+                     tuple((nome, tuple(valor) if isinstance(valor, list) else valor) for nome, valor in normalizados.items()))
+            hash(chave)
+        except TypeError:
+            return funcao(*args, **kwargs)
+
+        global _memoria_em_uso
+        with _lock_cache:
+            entrada = _entradas.get(chave)
+            if entrada is not None and entrada[2] is not None and entrada[2] <= time.monotonic():
+                _remover(chave)
+                entrada = None
+            if entrada is not None:
+                _entradas.move_to_end(chave)
+                _estatisticas["acertos"] += 1
+                return _copiar(entrada[0])
+            _estatisticas["falhas"] += 1
+
+        resultado = funcao(**normalizados)
+        vazio = resultado is None or (isinstance(resultado, pd.DataFrame) and resultado.empty) or (isinstance(resultado, (list, dict)) and not resultado)
+        if vazio: return resultado
+
+        tamanho = _tamanho_estimado(resultado)
+        if tamanho > LIMITE_MEMORIA_CACHE: return resultado
+        expira_em = time.monotonic() + TTL_CACHE_DADOS if TTL_CACHE_DADOS else None
+        with _lock_cache:
+            if chave not in _entradas:
+                _entradas[chave] = (_copiar(resultado), tamanho, expira_em)
+                _entradas_por_funcao[chave[:2]] += 1
+                _memoria_em_uso += tamanho
+            _remover_excedente(chave[:2])
+        return resultado
+    return wrapper
+
+def estatisticas_cache():
+    """Retorna os contadores do cache (acertos, falhas, remoções) e sua ocupação atual"""
+    with _lock_cache:
+        consultas = _estatisticas["acertos"] + _estatisticas["falhas"]
+        return {
+            **_estatisticas,
+            "taxa_acerto": _estatisticas["acertos"] / consultas if consultas else 0.0,
+            "entradas": len(_entradas),
+            "memoria_bytes": _memoria_em_uso,
+            "limite_bytes": LIMITE_MEMORIA_CACHE,
+        }
+
+def definir_limite_cache(limite_bytes):
+    """Altera o limite de memória do cache, removendo as entradas menos usadas se necessário"""
+    global LIMITE_MEMORIA_CACHE
+    with _lock_cache:
+        LIMITE_MEMORIA_CACHE = int(limite_bytes)
+        _remover_excedente()
+
+def limpar_cache():
+    """Remove todas as entradas do cache e zera os contadores"""
+    global _memoria_em_uso
+    with _lock_cache:
+        _entradas.clear()
+        _entradas_por_funcao.clear()
+        _memoria_em_uso = 0
+        for nome in _estatisticas:
+            _estatisticas[nome] = 0
@@ -0,0 +1,294 @@
+import hashlib
+import itertools
+import json
+import os
+import re
+import threading
+import time
+import pyarrow.parquet as pq
+from queries.connection import BACKEND_DADOS, obter_banco, obter_conexao
+from queries.statements import literal_sql
+
+# Nome da view que expõe as movimentações de uma pasta Parquet às consultas
+NOME_VIEW = "movimentacoes"
+
+# Intervalo mínimo, em segundos, entre duas verificações da pasta de um mesmo dataset
+INTERVALO_VERIFICACAO = 1.0
+
+# Subpastas no layout Hive (ex.: ANO=2024/MES=1) e os tipos de suas colunas de partição
+PADRAO_PARTICAO = re.compile(r"^([A-Za-z_][A-Za-z0-9_]*)=[^/\\]+$")
+TIPOS_PARTICAO = {"ANO": "BIGINT", "MES": "BIGINT"}
+
+# Colunas do esquema atual do conversor calculadas, na view, para arquivos gerados antes dele
+# (com horários em structs HH_*, sem o total de passageiros ou sem o atraso). Cada arquivo recebe
+# apenas as que lhe faltam, nesta ordem (uma expressão pode usar as colunas calculadas antes dela).
+COLUNAS_DERIVADAS_LEGADO = {
+    "MIN_PREVISTO": "HH_PREVISTO.TotalMinutes",
+    "MIN_CALCO": "HH_CALCO.TotalMinutes",
+    "MIN_TOQUE": "HH_TOQUE.TotalMinutes",
+    "QT_PAX_TOTAL": "QT_PAX_LOCAL + QT_PAX_CONEXAO_DOMESTICO + QT_PAX_CONEXAO_INTERNACIONAL",
+    "MIN_ATRASO": "(TRY_CAST(DT_CALCO AS DATE) - TRY_CAST(DT_PREVISTO AS DATE)) * 1440 + MIN_CALCO - MIN_PREVISTO",
+}
+
+# Manifesto gravado pela compactação (compactar_dataset_parquet.py) com os segmentos ativos e os
+# arquivos que eles substituíram. Como é trocado de uma vez (os.replace), as consultas passam dos
+# arquivos mensais aos segmentos sem nunca enxergar os dois (ou nenhum) ao mesmo tempo.
+ARQUIVO_SEGMENTOS = "_segmentos.json"
+PREFIXO_SEGMENTO = "segmento_"
+
+# Banco DuckDB persistente da pasta (queries/banco_nativo.py), com as movimentações em uma tabela
+# nativa e a impressão digital da versão do dataset carregada nele
+ARQUIVO_BANCO_NATIVO = "_banco.duckdb"
+TABELA_NATIVA = "movimentacoes"
+TABELA_VERSAO_NATIVA = "versao_dataset"
+
+_datasets = {}
+_lock_catalogo = threading.Lock()
+_contador_bancos = itertools.count(1)
+
+def _listar_recursivo(pasta):
+    """Lista os arquivos Parquet da pasta e de suas partições Hive, ignorando os iniciados por '_' ou '.'"""
+    if not os.path.isdir(pasta): return []
+    arquivos = []
+    with os.scandir(pasta) as entradas:
+        for entrada in entradas:
+            if entrada.name.startswith(('_', '.')): continue
+            if entrada.is_file() and entrada.name.endswith('.parquet'):
+                arquivos.append(entrada.path)
+            elif entrada.is_dir() and PADRAO_PARTICAO.match(entrada.name):
+                arquivos.extend(_listar_recursivo(entrada.path))
+    return arquivos
+
+def ler_segmentos(pasta_parquet):
+    """Lê o manifesto de segmentos: {'segmentos': [caminhos relativos], 'substituidos': {caminho relativo: [tamanho, mtime_ns]}}"""
+    try:
+        with open(os.path.join(pasta_parquet, ARQUIVO_SEGMENTOS), "r", encoding="utf-8") as f:
+            manifesto = json.load(f)
+        return {"segmentos": [], "substituidos": {}, **manifesto}
+    except (OSError, ValueError):
+        return {"segmentos": [], "substituidos": {}}
+
+def gravar_segmentos(pasta_parquet, manifesto):
+    """Grava o manifesto de segmentos de forma atômica (arquivo temporário + os.replace)"""
+    caminho = os.path.join(pasta_parquet, ARQUIVO_SEGMENTOS)
+    with open(caminho + ".tmp", "w", encoding="utf-8") as f:
+        json.dump(manifesto, f, ensure_ascii=False, indent=1)
+    os.replace(caminho + ".tmp", caminho)
+
+def caminho_relativo(caminho, pasta_parquet):
+    """Caminho relativo à pasta do dataset, com '/' como separador (formato usado nos manifestos)"""
+    return os.path.relpath(caminho, pasta_parquet).replace(os.sep, "/")
+
+def listar_arquivos_parquet(pasta_parquet):
+    """Lista os arquivos de dados ativos da pasta e de suas partições Hive (CHAVE=valor).
+
+    Arquivos e pastas iniciados por '_' ou '.' são ignorados; são reservados a artefatos auxiliares.
+    Segmentos só aparecem se estiverem ativos no manifesto de segmentos, e arquivos substituídos
+    por um segmento são omitidos até serem removidos (a menos que tenham sido regravados depois).
+    """
+    segmentos = ler_segmentos(pasta_parquet)
+    ativos, substituidos = set(segmentos["segmentos"]), segmentos["substituidos"]
+    arquivos = []
+    for caminho in _listar_recursivo(pasta_parquet):
+        relativo = caminho_relativo(caminho, pasta_parquet)
+        if os.path.basename(caminho).startswith(PREFIXO_SEGMENTO):
+            if relativo in ativos: arquivos.append(caminho)
+            continue
+        if relativo in substituidos:
+            try:
+                info = os.stat(caminho)
+            except OSError:
+                continue
+            if [info.st_size, info.st_mtime_ns] == list(substituidos[relativo]): continue
+        arquivos.append(caminho)
+    return sorted(arquivos)
+
+def chaves_particao(caminho, pasta_parquet):
+    """Retorna as chaves de partição Hive presentes no caminho relativo do arquivo"""
+    pastas = os.path.relpath(os.path.dirname(caminho), pasta_parquet).split(os.sep)
+    return tuple(PADRAO_PARTICAO.match(nome).group(1) for nome in pastas if PADRAO_PARTICAO.match(nome))
+
+def calcular_versao_dataset(arquivos_parquet):
+    """Calcula a versão do dataset a partir do caminho, tamanho e data de modificação dos arquivos"""
+    versao = []
+    for caminho in arquivos_parquet:
+        try:
+            info = os.stat(caminho)
+        except OSError:
+            continue
+        versao.append((caminho, info.st_size, info.st_mtime_ns))
+    return tuple(versao)
+
+def impressao_relativa(pasta_parquet, versao):
+    """Impressão digital da versão do dataset com caminhos relativos à pasta (gravada no banco nativo)"""
+    relativa = tuple((caminho_relativo(caminho, pasta_parquet), tamanho, mtime) for caminho, tamanho, mtime in versao)
+    return hashlib.sha1(repr(relativa).encode("utf-8")).hexdigest()
+
+def _sql_lista_arquivos(arquivos_parquet):
+    """Monta a lista SQL de caminhos, escapando aspas simples"""
+    return "[" + ", ".join("'" + caminho.replace("'", "''") + "'" for caminho in arquivos_parquet) + "]"
+
+def _colunas_ausentes(caminho):
+    """Retorna as colunas de COLUNAS_DERIVADAS_LEGADO que faltam no arquivo (gerado antes do esquema atual)"""
+    try:
+        nomes = set(pq.read_schema(caminho).names)
+    except Exception:
+        return ()
+    return tuple(coluna for coluna in COLUNAS_DERIVADAS_LEGADO if coluna not in nomes)
+
+def sql_leitura_dataset(pasta_parquet, arquivos_parquet):
+    """Monta o SELECT que lê os arquivos do dataset.
+
+    Arquivos no layout Hive são lidos com hive_partitioning, o que permite ao DuckDB descartar
+    partições inteiras a partir dos filtros de ANO e MES. Arquivos no esquema antigo recebem as
+    colunas derivadas (COLUNAS_DERIVADAS_LEGADO), de modo que as consultas usem sempre as mesmas
+    colunas. Grupos de arquivos com layouts ou esquemas diferentes são combinados com UNION ALL BY NAME.
+    """
+    grupos = {}
+    for caminho in arquivos_parquet:
+        grupos.setdefault((chaves_particao(caminho, pasta_parquet), _colunas_ausentes(caminho)), []).append(caminho)
+    partes = []
+    for (chaves, ausentes), arquivos in sorted(grupos.items()):
+        opcoes = ""
+        if chaves:
+            tipos = ", ".join(f"'{chave}': '{TIPOS_PARTICAO[chave]}'" for chave in chaves if chave in TIPOS_PARTICAO)
+            opcoes = ", hive_partitioning = true" + (f", hive_types = {{{tipos}}}" if tipos else "")
+        derivadas = "".join(f", {COLUNAS_DERIVADAS_LEGADO[coluna]} AS {coluna}" for coluna in ausentes)
+        partes.append(f"SELECT *{derivadas} FROM read_parquet({_sql_lista_arquivos(arquivos)}{opcoes})")
+    return " UNION ALL BY NAME ".join(partes)
+
+def _nome_view_disponivel():
+    """Escolhe o nome da view: o primeiro dataset registrado recebe NOME_VIEW"""
+    nomes_em_uso = {registro["view"] for (_, subpasta), registro in _datasets.items() if subpasta is None}
+    if NOME_VIEW not in nomes_em_uso: return NOME_VIEW
+    indice = 2
+    while f"{NOME_VIEW}_{indice}" in nomes_em_uso:
+        indice += 1
+    return f"{NOME_VIEW}_{indice}"
+
+def arquivos_auxiliares(versao_dados, pasta_auxiliar):
+    """Associa a cada arquivo de dados ativo o arquivo de mesmo nome de um artefato derivado.
+
+    Retorna os arquivos do artefato, sua versão e se ele cobre o dataset: cada nome de arquivo de
+    dados precisa ter um arquivo no artefato mais recente que ele. Arquivos do artefato sem dados
+    ativos correspondentes (ex.: de meses já compactados) são ignorados.
+    """
+    modificacao_dados = {}
+    for caminho, _, mtime in versao_dados:
+        nome = os.path.basename(caminho)
+        modificacao_dados[nome] = max(mtime, modificacao_dados.get(nome, 0))
+    arquivos = [os.path.join(pasta_auxiliar, nome) for nome in sorted(modificacao_dados)]
+    versao_auxiliar = calcular_versao_dataset(arquivos)
+    cobre = len(versao_auxiliar) == len(arquivos) and all(
+        mtime >= modificacao_dados[os.path.basename(caminho)] for caminho, _, mtime in versao_auxiliar)
+    return arquivos, versao_auxiliar, cobre
+
+def _desanexar_banco_nativo(con, nome):
+    """Desanexa um banco nativo que não é mais usado por nenhuma view"""
+    try:
+        con.execute(f"DETACH DATABASE IF EXISTS {nome}")
+    except Exception as e:
+        print(f"DEBUG: Erro ao desanexar o banco '{nome}': {e}")
+
+def _anexar_banco_nativo(con, pasta_parquet, versao):
+    """Anexa, somente leitura, o banco nativo da pasta se ele contiver a versão atual do dataset.
+
+    Retorna o nome do banco anexado, ou None se ele não existir ou estiver desatualizado; nesse
+    caso as consultas continuam lendo os arquivos Parquet.
+    """
+    caminho = os.path.join(pasta_parquet, ARQUIVO_BANCO_NATIVO)
+    if not os.path.exists(caminho): return None
+    nome = f"banco_nativo_{next(_contador_bancos)}"
+    try:
+        con.execute(f"ATTACH {literal_sql(caminho)} AS {nome} (READ_ONLY)")
+        impressao = con.execute(f"SELECT impressao FROM {nome}.{TABELA_VERSAO_NATIVA}").fetchone()[0]
+    except Exception as e:
+        print(f"DEBUG: Erro ao anexar o banco nativo de '{pasta_parquet}': {e}")
+        _desanexar_banco_nativo(con, nome)
+        return None
+    if impressao != impressao_relativa(pasta_parquet, versao):
+        print(f"DEBUG: Banco nativo de '{pasta_parquet}' desatualizado; usando os arquivos Parquet.")
+        _desanexar_banco_nativo(con, nome)
+        return None
+    return nome
+
+def _sincronizar_view(chave, subpasta, registro_dados=None):
+    """Registra (ou atualiza) a view do dataset ou de um artefato derivado na versão atual"""
+    banco = obter_banco()
+    agora = time.monotonic()
+    registro = _datasets.get((chave, subpasta))
+    if registro and registro["banco"] is banco and agora - registro["verificado_em"] < INTERVALO_VERIFICACAO:
+        return registro["view"] if registro["ativa"] else None
+
+    with _lock_catalogo:
+        registro = _datasets.get((chave, subpasta))
+        versao_banco = ()
+        if subpasta is None:
+            arquivos_parquet = listar_arquivos_parquet(chave)
+            versao = calcular_versao_dataset(arquivos_parquet)
+            ativa = bool(versao)
+            if BACKEND_DADOS == "duckdb":
+                versao_banco = calcular_versao_dataset([os.path.join(chave, ARQUIVO_BANCO_NATIVO)])
+        else:
+            arquivos_parquet, versao_auxiliar, cobre = arquivos_auxiliares(registro_dados["versao"], os.path.join(chave, subpasta))
+            versao = (registro_dados["versao"], versao_auxiliar)
+            ativa = bool(versao_auxiliar) and cobre
+        if registro and registro["banco"] is banco and registro["versao"] == versao and registro["versao_banco"] == versao_banco:
+            registro["verificado_em"] = agora
+            return registro["view"] if registro["ativa"] else None
+
+        if registro:
+            view = registro["view"]
+        else:
+            view = _nome_view_disponivel() if subpasta is None else registro_dados["view"] + subpasta
+        con = obter_conexao()
+        nativo = _anexar_banco_nativo(con, chave, versao) if ativa and versao_banco else None
+        try:
+            if nativo:
+                con.execute(f"CREATE OR REPLACE VIEW {view} AS SELECT * FROM {nativo}.{TABELA_NATIVA}")
+            elif ativa and subpasta is None:
+                con.execute(f"CREATE OR REPLACE VIEW {view} AS {sql_leitura_dataset(chave, arquivos_parquet)}")
+            elif ativa:
+                con.execute(f"CREATE OR REPLACE VIEW {view} AS SELECT * FROM read_parquet({_sql_lista_arquivos(arquivos_parquet)})")
+            else:
+                con.execute(f"DROP VIEW IF EXISTS {view}")
+        except Exception as e:
+            print(f"DEBUG: Erro ao registrar a view '{view}' do dataset '{chave}': {e}")
+            if nativo: _desanexar_banco_nativo(con, nativo)
+            _datasets.pop((chave, subpasta), None)
+            return None
+        if registro and registro["banco"] is banco and registro["nativo"]:
+            _desanexar_banco_nativo(con, registro["nativo"]) # A view já aponta para a nova origem
+        impressao = hashlib.sha1(repr(versao).encode("utf-8")).hexdigest() if ativa else None
+        _datasets[(chave, subpasta)] = {"view": view, "versao": versao, "versao_banco": versao_banco, "nativo": nativo,
+                                        "impressao": impressao, "ativa": ativa, "banco": banco, "verificado_em": agora}
+        return view if ativa else None
+
+def obter_view(pasta_parquet):
+    """Garante que a view do dataset esteja registrada na versão atual e retorna seu nome.
+
+    A pasta é listada no máximo uma vez a cada INTERVALO_VERIFICACAO segundos; a view só é
+    recriada quando a versão (arquivos, tamanhos e datas) muda. Retorna None se não houver
+    arquivos Parquet na pasta.
+    """
+    return _sincronizar_view(os.path.abspath(pasta_parquet), None)
+
+def obter_view_auxiliar(pasta_parquet, subpasta):
+    """Retorna a view de um artefato derivado (ex.: '_rollup') se ele cobrir todo o dataset.
+
+    O artefato fica em pasta_parquet/subpasta, com um arquivo por arquivo de dados de mesmo
+    nome. Se faltar algum arquivo ou algum estiver desatualizado, retorna None e as consultas
+    devem recorrer aos dados brutos.
+    """
+    if not obter_view(pasta_parquet): return None
+    chave = os.path.abspath(pasta_parquet)
+    return _sincronizar_view(chave, subpasta, _datasets[(chave, None)])
+
+def obter_impressao_dataset(pasta_parquet):
+    """Retorna a impressão digital (hash dos arquivos, tamanhos e datas) da versão atual do dataset.
+
+    Muda sempre que um arquivo Parquet é adicionado, removido ou substituído; é None se não houver dados.
+    """
+    if not obter_view(pasta_parquet): return None
+    registro = _datasets.get((os.path.abspath(pasta_parquet), None))
+    return registro["impressao"] if registro else None
@@ -0,0 +1,59 @@
+import os
+import threading
+import duckdb
+
+# Configurações aplicadas uma única vez ao banco compartilhado. Mantêm os metadados
+# (footers) dos arquivos Parquet em memória entre consultas.
+CONFIGURACOES_DUCKDB = {
+    "enable_object_cache": True,
+    "parquet_metadata_cache": True,
+}
+
+# Origem dos dados das consultas: "parquet" lê os arquivos da pasta a cada consulta; "duckdb" usa a
+# tabela nativa do banco '_banco.duckdb' da pasta (gerado na ingestão), se estiver atualizada.
+BACKEND_DADOS = os.environ.get("BACKEND_DADOS", "parquet").lower()
+
+_banco = None
+_lock_banco = threading.Lock()
+_local = threading.local()
+
+def obter_banco():
+    """Retorna a conexão raiz do processo, criando-a na primeira chamada"""
+    global _banco
+    if _banco is None:
+        with _lock_banco:
+            if _banco is None:
+                banco = duckdb.connect(database=':memory:', read_only=False)
+                for nome, valor in CONFIGURACOES_DUCKDB.items():
+                    try:
+                        banco.execute(f"SET {nome} = {str(valor).lower()}")
+                    except Exception as e:
+                        print(f"DEBUG: Configuração DuckDB '{nome}' não aplicada: {e}")
+                _banco = banco
+    return _banco
+
+def obter_conexao():
+    """Obtém o cursor DuckDB da thread atual, compartilhando o banco do processo.
+
+    Cada thread (sessão do Streamlit) recebe seu próprio cursor, mas todos usam o mesmo
+    banco em memória, de modo que o cache de metadados Parquet permanece aquecido entre
+    consultas. O cursor não deve ser fechado por quem o utiliza.
+    """
+    banco = obter_banco()
+    cursor = getattr(_local, "cursor", None)
+    if cursor is None or getattr(_local, "banco", None) is not banco:
+        cursor = banco.cursor()
+        _local.cursor = cursor
+        _local.banco = banco
+    return cursor
+
+def fechar_conexoes():
+    """Fecha o banco compartilhado; a próxima chamada a obter_conexao recria tudo"""
+    global _banco
+    with _lock_banco:
+        if _banco is not None:
+            try:
+                _banco.close()
+            except Exception as e:
+                print(f"DEBUG: Erro ao fechar a conexão DuckDB: {e}")
+            _banco = None
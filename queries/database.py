@@ -1,71 +1,140 @@
 import os
 import pandas as pd
-import duckdb
+from queries.agregados import escolher_fonte
+from queries.rankings import CONDICOES_ATRASO
+from queries.statements import executar_preparada, montar_where
+from queries.cache import em_cache
 
+@em_cache
 def consultar_movimentacoes_aeroportuarias(pasta_parquet, aeroporto=None, ano=None, mes=None, tipo_movimento=None, natureza=None, tipo_consulta="passageiros"):
     """Consulta as movimentações aeroportuárias com base nos parâmetros fornecidos"""
     if not os.path.exists(pasta_parquet): return pd.DataFrame()
-    con = duckdb.connect(database=':memory:', read_only=False)
-    arquivos_parquet = [os.path.join(pasta_parquet, f) for f in os.listdir(pasta_parquet) if f.endswith('.parquet')]
-    if not arquivos_parquet:
-        con.close()
+    filtros = [
+        ("NR_AEROPORTO_REFERENCIA", aeroporto.upper() if aeroporto else None),
+        ("ANO", ano),
+        ("MES", mes),
+        ("NR_MOVIMENTO_TIPO", tipo_movimento.upper() if tipo_movimento else None),
+        ("NR_NATUREZA", natureza.upper() if natureza else None),
+    ]
+    medida = "carga" if tipo_consulta == "carga" else "passageiros"
+    view, medidas = escolher_fonte(pasta_parquet, [coluna for coluna, valor in filtros if valor], [medida])
+    if not view:
         return pd.DataFrame()
     
-    condicoes = []
-    if aeroporto: condicoes.append(f"NR_AEROPORTO_REFERENCIA = '{aeroporto.upper()}'")
-    if ano: condicoes.append(f"ANO = {ano}")
-    if mes: condicoes.append(f"MES = {mes}")
-    if tipo_movimento: condicoes.append(f"NR_MOVIMENTO_TIPO = '{tipo_movimento.upper()}'")
-    if natureza: condicoes.append(f"NR_NATUREZA = '{natureza.upper()}'")
-    where_clause = "WHERE " + " AND ".join(condicoes) if condicoes else ""
-    
-    if tipo_consulta == "passageiros":
-        select_clause = "SUM(QT_PAX_LOCAL + QT_PAX_CONEXAO_DOMESTICO + QT_PAX_CONEXAO_INTERNACIONAL) AS TotalValor"
-    elif tipo_consulta == "carga":
-        select_clause = "SUM(QT_CARGA) AS TotalValor"
-    else:
-        select_clause = "SUM(QT_PAX_LOCAL + QT_PAX_CONEXAO_DOMESTICO + QT_PAX_CONEXAO_INTERNACIONAL) AS TotalValor"
-    
-    query = f"SELECT {select_clause} FROM read_parquet({arquivos_parquet}) {where_clause}"
+    where_clause, parametros = montar_where(filtros)
+    query = f"SELECT {medidas[medida]} AS TotalValor FROM {view} {where_clause}"
     try:
-        return con.execute(query).fetchdf()
+        return executar_preparada(query, parametros).fetchdf()
     except Exception as e:
         print(f"DEBUG: Erro ao executar a consulta DuckDB: {e}")
         return pd.DataFrame()
-    finally:
-        con.close()
 
+@em_cache
 def obter_historico_movimentacao(pasta_parquet, tipo_consulta="passageiros", aeroporto=None):
     """Obtém o histórico de movimentação por ano"""
     if not os.path.exists(pasta_parquet): return None
-    con = duckdb.connect(database=':memory:', read_only=False)
-    arquivos_parquet = [os.path.join(pasta_parquet, f) for f in os.listdir(pasta_parquet) if f.endswith('.parquet')]
-    if not arquivos_parquet:
-        con.close()
+    medida = "passageiros" if tipo_consulta == "passageiros" else "carga"
+    view, medidas = escolher_fonte(pasta_parquet, ["ANO", "NR_AEROPORTO_REFERENCIA"], [medida])
+    if not view:
         return None
     
-    condicoes = []
-    if aeroporto:
-        condicoes.append(f"NR_AEROPORTO_REFERENCIA = '{aeroporto.upper()}'")
-    where_clause = "WHERE " + " AND ".join(condicoes) if condicoes else ""
-    
-    if tipo_consulta == "passageiros":
-        select_clause = "SUM(QT_PAX_LOCAL + QT_PAX_CONEXAO_DOMESTICO + QT_PAX_CONEXAO_INTERNACIONAL) AS TotalValor"
-    else:
-        select_clause = "SUM(QT_CARGA) AS TotalValor"
+    where_clause, parametros = montar_where([("NR_AEROPORTO_REFERENCIA", aeroporto.upper() if aeroporto else None)])
     
     query = f"""
-    SELECT ANO, {select_clause}
-    FROM read_parquet({arquivos_parquet})
+    SELECT ANO, {medidas[medida]} AS TotalValor
+    FROM {view}
     {where_clause}
     GROUP BY ANO
     ORDER BY ANO
     """
     try:
-        resultado = con.execute(query).fetchdf()
+        resultado = executar_preparada(query, parametros).fetchdf()
         return resultado if not resultado.empty else None
     except Exception as e:
         print(f"DEBUG: Erro ao obter histórico de movimentação: {e}")
+        return None 
+def _filtros_atraso(ano=None, mes=None, aeroporto=None, operador=None):
+    """Filtros das consultas de pontualidade e as colunas que eles exigem da fonte"""
+    filtros = [
+        ("ANO", ano),
+        ("MES", mes),
+        ("NR_AEROPORTO_REFERENCIA", aeroporto.upper() if aeroporto else None),
+        ("NR_AERONAVE_OPERADOR", operador.upper() if operador else None),
+    ]
+    colunas = [coluna for coluna, valor in filtros if valor] + ["NR_MOVIMENTO_TIPO", "NR_AERONAVE_OPERADOR"]
+    return filtros, colunas
+
+@em_cache
+def obter_pontualidade(pasta_parquet, ano=None, mes=None, aeroporto=None, operador=None):
+    """
+    Calcula a pontualidade dos pousos de operadores regulares no período, aeroporto e operador especificados.
+
+    Pousos com mais de MINUTOS_TOLERANCIA_ATRASO minutos de atraso (do horário previsto ao calço) contam
+    como atrasados; só entram na taxa os pousos com os dois horários registrados.
+
+    Returns:
+        dict: {'movimentos', 'atrasados', 'taxa_pontualidade' (%), 'atraso_medio' e 'atraso_maximo' (minutos), e os filtros},
+        ou None se não houver dados.
+    """
+    if not os.path.exists(pasta_parquet): return None
+    filtros, colunas = _filtros_atraso(ano, mes, aeroporto, operador)
+    view, medidas = escolher_fonte(pasta_parquet, colunas, ["com_horario", "atrasados", "atraso", "atraso_maximo"])
+    if not view:
+        return None
+    
+    where_clause, parametros = montar_where(filtros, condicoes_fixas=CONDICOES_ATRASO)
+    query = f"""
+    SELECT
+        {medidas['com_horario']} AS Movimentos,
+        {medidas['atrasados']} AS Atrasados,
+        {medidas['atraso']} AS MinutosAtraso,
+        {medidas['atraso_maximo']} AS AtrasoMaximo
+    FROM {view}
+    {where_clause}
+    """
+    try:
+        movimentos, atrasados, minutos_atraso, atraso_maximo = executar_preparada(query, parametros).fetchone()
+    except Exception as e:
+        print(f"DEBUG: Erro ao obter a pontualidade: {e}")
+        return None
+    if not movimentos:
+        return None
+    return {
+        "movimentos": int(movimentos),
+        "atrasados": int(atrasados),
+        "taxa_pontualidade": 100.0 * (movimentos - atrasados) / movimentos,
+        "atraso_medio": minutos_atraso / movimentos,
+        "atraso_maximo": int(atraso_maximo),
+        "ano": ano, "mes": mes, "aeroporto": aeroporto, "operador": operador,
+    }
+
+@em_cache
+def obter_tendencia_atrasos(pasta_parquet, ano=None, aeroporto=None, operador=None):
+    """Obtém, mês a mês, a pontualidade e os atrasos dos pousos de operadores regulares"""
+    if not os.path.exists(pasta_parquet): return None
+    filtros, colunas = _filtros_atraso(ano, None, aeroporto, operador)
+    view, medidas = escolher_fonte(pasta_parquet, colunas + ["ANO", "MES"], ["com_horario", "atrasados", "atraso", "atraso_maximo"])
+    if not view:
+        return None
+    
+    where_clause, parametros = montar_where(filtros, condicoes_fixas=CONDICOES_ATRASO)
+    query = f"""
+    SELECT
+        ANO, MES,
+        CAST({medidas['com_horario']} AS BIGINT) AS Movimentos,
+        CAST({medidas['atrasados']} AS BIGINT) AS Atrasados,
+        100.0 * (Movimentos - Atrasados) / NULLIF(Movimentos, 0) AS TaxaPontualidade,
+        {medidas['atraso']} / NULLIF(Movimentos, 0) AS AtrasoMedio,
+        {medidas['atraso_maximo']} AS AtrasoMaximo
+    FROM {view}
+    {where_clause}
+    GROUP BY ANO, MES
+    HAVING Movimentos > 0
+    ORDER BY ANO, MES
+    """
+    try:
+        resultado = executar_preparada(query, parametros).fetchdf()
+        return resultado if not resultado.empty else None
+    except Exception as e:
+        print(f"DEBUG: Erro ao obter a tendência de atrasos: {e}")
         return None
-    finally:
-        con.close() 
\ No newline at end of file
@@ -0,0 +1,169 @@
+import datetime
+import json
+import os
+import threading
+import pyarrow.parquet as pq
+from queries.catalog import PADRAO_PARTICAO, listar_arquivos_parquet, calcular_versao_dataset, obter_impressao_dataset
+
+# Arquivo, na pasta Parquet, com a cobertura e as estatísticas de cada arquivo de dados
+ARQUIVO_MANIFESTO = "_manifesto.json"
+VERSAO_MANIFESTO = 1
+
+_manifestos = {}
+_lock_manifesto = threading.Lock()
+
+def _valores_particao(caminho_relativo):
+    """Extrai os valores de partição Hive (ex.: ANO=2024) do caminho relativo do arquivo"""
+    valores = {}
+    for nome in os.path.dirname(caminho_relativo).split(os.sep):
+        if PADRAO_PARTICAO.match(nome):
+            chave, valor = nome.split("=", 1)
+            valores[chave] = int(valor) if valor.isdigit() else valor
+    return valores
+
+def _valor_json(valor):
+    """Converte um valor de estatística do Parquet em um valor serializável em JSON"""
+    if isinstance(valor, (bool, int, float, str)) or valor is None: return valor
+    if isinstance(valor, bytes): return valor.decode("utf-8", errors="replace")
+    return str(valor)
+
+def _descrever_arquivo(caminho, caminho_relativo, tamanho, modificado_em):
+    """Monta a entrada do manifesto a partir do footer do arquivo Parquet (sem ler os dados)"""
+    metadados = pq.ParquetFile(caminho).metadata
+    colunas = {}
+    for i in range(metadados.num_row_groups):
+        grupo = metadados.row_group(i)
+        for j in range(grupo.num_columns):
+            coluna = grupo.column(j)
+            estatisticas = coluna.statistics
+            atual = colunas.setdefault(coluna.path_in_schema, {"min": None, "max": None, "completa": True})
+            if estatisticas is None or not estatisticas.has_min_max:
+                atual["completa"] = False
+                continue
+            minimo, maximo = _valor_json(estatisticas.min), _valor_json(estatisticas.max)
+            atual["min"] = minimo if atual["min"] is None else min(atual["min"], minimo)
+            atual["max"] = maximo if atual["max"] is None else max(atual["max"], maximo)
+    colunas = {nome: {"min": info["min"], "max": info["max"]} if info["completa"] else {"min": None, "max": None}
+               for nome, info in colunas.items()}
+
+    particao = _valores_particao(caminho_relativo)
+    for chave, valor in particao.items():
+        colunas[chave] = {"min": valor, "max": valor}
+    ano, mes = colunas.get("ANO", {}), colunas.get("MES", {})
+    if ano.get("min") is not None and ano.get("min") == ano.get("max") and mes.get("min") is not None and mes.get("min") == mes.get("max"):
+        periodos = [[ano["min"], mes["min"]]]
+    else:
+        # Arquivo com mais de um mês (ex.: compactado por ano): lê apenas as colunas de período
+        tabela = pq.read_table(caminho, columns=[c for c in ("ANO", "MES") if c not in particao])
+        periodos_df = tabela.to_pandas()
+        for chave, valor in particao.items():
+            periodos_df[chave] = valor
+        periodos = sorted({(int(a), int(m)) for a, m in periodos_df[["ANO", "MES"]].dropna().itertuples(index=False)})
+        periodos = [list(periodo) for periodo in periodos]
+
+    return {
+        "tamanho": tamanho,
+        "modificado_em": modificado_em,
+        "linhas": metadados.num_rows,
+        "grupos_de_linhas": metadados.num_row_groups,
+        "periodos": periodos,
+        "colunas": colunas,
+    }
+
+def _ler_manifesto(pasta_parquet):
+    """Lê o manifesto gravado na pasta, se existir e for válido"""
+    caminho = os.path.join(pasta_parquet, ARQUIVO_MANIFESTO)
+    try:
+        with open(caminho, "r", encoding="utf-8") as f:
+            manifesto = json.load(f)
+        if manifesto.get("versao") == VERSAO_MANIFESTO:
+            return manifesto
+    except (OSError, ValueError):
+        pass
+    return {"versao": VERSAO_MANIFESTO, "arquivos": {}}
+
+def _gravar_manifesto(pasta_parquet, manifesto):
+    """Grava o manifesto de forma atômica (arquivo temporário + os.replace)"""
+    caminho = os.path.join(pasta_parquet, ARQUIVO_MANIFESTO)
+    caminho_temporario = caminho + ".tmp"
+    try:
+        with open(caminho_temporario, "w", encoding="utf-8") as f:
+            json.dump(manifesto, f, ensure_ascii=False, indent=1)
+        os.replace(caminho_temporario, caminho)
+    except OSError as e:
+        print(f"DEBUG: Não foi possível gravar o manifesto em '{pasta_parquet}': {e}")
+
+def atualizar_manifesto(pasta_parquet):
+    """
+    Sincroniza o manifesto com os arquivos Parquet da pasta e o grava em disco.
+
+    Apenas arquivos novos ou alterados (tamanho ou data de modificação diferentes) são
+    descritos novamente, a partir dos footers; entradas de arquivos removidos são descartadas.
+
+    Returns:
+        dict: O manifesto atualizado.
+    """
+    pasta_parquet = os.path.abspath(pasta_parquet)
+    with _lock_manifesto:
+        manifesto = _ler_manifesto(pasta_parquet)
+        anteriores = manifesto.get("arquivos", {})
+        arquivos = {}
+        alterado = False
+        for caminho, tamanho, modificado_em in calcular_versao_dataset(listar_arquivos_parquet(pasta_parquet)):
+            caminho_relativo = os.path.relpath(caminho, pasta_parquet)
+            entrada = anteriores.get(caminho_relativo)
+            if entrada and entrada["tamanho"] == tamanho and entrada["modificado_em"] == modificado_em:
+                arquivos[caminho_relativo] = entrada
+                continue
+            try:
+                arquivos[caminho_relativo] = _descrever_arquivo(caminho, caminho_relativo, tamanho, modificado_em)
+                alterado = True
+            except Exception as e:
+                print(f"DEBUG: Erro ao ler os metadados de '{caminho_relativo}': {e}")
+        alterado = alterado or set(arquivos) != set(anteriores)
+        manifesto["arquivos"] = arquivos
+        if alterado:
+            manifesto["gerado_em"] = datetime.datetime.now().isoformat(timespec="seconds")
+            _gravar_manifesto(pasta_parquet, manifesto)
+        return manifesto
+
+def carregar_manifesto(pasta_parquet):
+    """Retorna o manifesto da versão atual do dataset, reconstruindo-o se estiver desatualizado.
+
+    O resultado fica em memória até que a impressão digital do dataset mude, de modo que as
+    consultas de cobertura não tocam o disco nem os dados.
+    """
+    chave = os.path.abspath(pasta_parquet)
+    impressao = obter_impressao_dataset(chave)
+    if impressao is None: return None
+    em_memoria = _manifestos.get(chave)
+    if em_memoria and em_memoria[0] == impressao:
+        return em_memoria[1]
+    manifesto = atualizar_manifesto(chave)
+    _manifestos[chave] = (impressao, manifesto)
+    return manifesto
+
+def obter_periodos_disponiveis(pasta_parquet):
+    """Retorna a lista ordenada de pares (ano, mês) com dados"""
+    manifesto = carregar_manifesto(pasta_parquet)
+    if not manifesto: return []
+    return sorted({tuple(periodo) for entrada in manifesto["arquivos"].values() for periodo in entrada["periodos"]})
+
+def obter_anos_disponiveis(pasta_parquet):
+    """Retorna a lista ordenada de anos com dados"""
+    return sorted({ano for ano, _ in obter_periodos_disponiveis(pasta_parquet)})
+
+def obter_meses_disponiveis(pasta_parquet, ano):
+    """Retorna a lista ordenada de meses com dados no ano informado"""
+    return [mes for ano_periodo, mes in obter_periodos_disponiveis(pasta_parquet) if ano_periodo == int(ano)]
+
+def possui_dados(pasta_parquet, ano=None, mes=None):
+    """Indica se há dados para o ano e/ou mês informados (ou qualquer dado, se ambos forem None)"""
+    periodos = obter_periodos_disponiveis(pasta_parquet)
+    return any((not ano or ano_periodo == int(ano)) and (not mes or mes_periodo == int(mes)) for ano_periodo, mes_periodo in periodos)
+
+def obter_total_linhas(pasta_parquet):
+    """Retorna o total de movimentações registradas nos footers dos arquivos"""
+    manifesto = carregar_manifesto(pasta_parquet)
+    if not manifesto: return 0
+    return sum(entrada["linhas"] for entrada in manifesto["arquivos"].values())
@@ -0,0 +1,190 @@
+import os
+import threading
+import numpy as np
+from queries.agregados import escolher_fonte
+from queries.catalog import obter_impressao_dataset
+from queries.statements import executar_preparada
+
+# Medidas guardadas em cada par origem-destino-mês da matriz
+MEDIDAS_OD = ["voos", "passageiros", "carga"]
+
+# Indicador ICAO de localidade não informada; não corresponde a uma rota e fica fora da matriz
+AEROPORTO_NAO_INFORMADO = "ZZZZ"
+
+_matrizes = {}
+_lock_matriz = threading.Lock()
+
+def _construir_matriz(pasta_parquet):
+    """
+    Monta a matriz origem-destino (OD) mensal do dataset em arrays NumPy.
+
+    Cada voo aparece como decolagem ('D') no aeroporto de origem e, se o destino também for um
+    aeroporto de referência, como pouso ('P') no destino; os pousos só entram na matriz quando a
+    origem não é um aeroporto de referência no mês, para que nenhum voo seja contado duas vezes.
+
+    As linhas ficam ordenadas por origem, destino e período (formato CSR): os pares de uma origem
+    ocupam o intervalo inicio[i]:inicio[i + 1] dos arrays.
+    """
+    colunas = ["ANO", "MES", "NR_AEROPORTO_REFERENCIA", "NR_MOVIMENTO_TIPO", "NR_VOO_OUTRO_AEROPORTO"]
+    view, medidas = escolher_fonte(pasta_parquet, colunas, MEDIDAS_OD)
+    if not view: return None
+    query = f"""
+    WITH Movimentos AS (
+        SELECT
+            ANO, MES, NR_AEROPORTO_REFERENCIA AS Referencia, NR_MOVIMENTO_TIPO AS Tipo, NR_VOO_OUTRO_AEROPORTO AS Outro,
+            {medidas['voos']} AS Voos, {medidas['passageiros']} AS Passageiros, {medidas['carga']} AS Carga
+        FROM {view}
+        WHERE NR_VOO_OUTRO_AEROPORTO IS NOT NULL AND NR_VOO_OUTRO_AEROPORTO != '{AEROPORTO_NAO_INFORMADO}'
+        GROUP BY ALL
+    ),
+    Referencias AS (
+        SELECT DISTINCT ANO, MES, Referencia FROM Movimentos
+    )
+    SELECT
+        CASE WHEN Tipo = 'D' THEN Referencia ELSE Outro END AS Origem,
+        CASE WHEN Tipo = 'D' THEN Outro ELSE Referencia END AS Destino,
+        ANO, MES,
+        SUM(Voos) AS Voos, SUM(Passageiros) AS Passageiros, SUM(Carga) AS Carga
+    FROM Movimentos m
+    WHERE Tipo = 'D' OR NOT EXISTS (
+        SELECT 1 FROM Referencias r WHERE r.ANO = m.ANO AND r.MES = m.MES AND r.Referencia = m.Outro
+    )
+    GROUP BY ALL
+    """
+    resultado = executar_preparada(query).fetchdf()
+
+    aeroportos = np.unique(np.concatenate([resultado['Origem'].to_numpy(dtype=str), resultado['Destino'].to_numpy(dtype=str)]))
+    origem = np.searchsorted(aeroportos, resultado['Origem'].to_numpy(dtype=str)).astype(np.int32)
+    destino = np.searchsorted(aeroportos, resultado['Destino'].to_numpy(dtype=str)).astype(np.int32)
+    ordem = np.lexsort((resultado['MES'].to_numpy(), resultado['ANO'].to_numpy(), destino, origem))
+    origem = origem[ordem]
+    return {
+        "aeroportos": aeroportos,
+        "indice": {codigo: i for i, codigo in enumerate(aeroportos)},
+        "inicio": np.searchsorted(origem, np.arange(len(aeroportos) + 1)),
+        "origem": origem,
+        "destino": destino[ordem],
+        "ano": resultado['ANO'].to_numpy(dtype=np.int16)[ordem],
+        "mes": resultado['MES'].to_numpy(dtype=np.int8)[ordem],
+        **{medida: resultado[coluna].to_numpy(dtype=np.int64)[ordem] for medida, coluna in zip(MEDIDAS_OD, ["Voos", "Passageiros", "Carga"])},
+    }
+
+def carregar_matriz_od(pasta_parquet):
+    """Retorna a matriz OD da versão atual do dataset, montando-a na primeira chamada após cada mudança.
+
+    A matriz fica em memória até que a impressão digital do dataset mude; é montada a partir da
+    tabela agregada '_od', se estiver atualizada, ou dos dados brutos.
+    """
+    chave = os.path.abspath(pasta_parquet)
+    impressao = obter_impressao_dataset(chave)
+    if impressao is None: return None
+    em_memoria = _matrizes.get(chave)
+    if em_memoria and em_memoria[0] == impressao:
+        return em_memoria[1]
+    with _lock_matriz:
+        em_memoria = _matrizes.get(chave)
+        if em_memoria and em_memoria[0] == impressao:
+            return em_memoria[1]
+        try:
+            matriz = _construir_matriz(chave)
+        except Exception as e:
+            print(f"DEBUG: Erro ao montar a matriz OD de '{chave}': {e}")
+            return None
+        _matrizes[chave] = (impressao, matriz)
+        return matriz
+
+def _resolver_ano(pasta_parquet, ano):
+    """Ano das consultas: o informado ou, se None, o último ano disponível"""
+    if ano is not None: return ano
+    from utils.helpers import obter_ultimo_ano_disponivel
+    return obter_ultimo_ano_disponivel(pasta_parquet)
+
+def _somar_por_chave(matriz, linhas, chaves):
+    """Soma as medidas das `linhas` da matriz agrupadas por `chaves`; retorna as chaves únicas e os totais"""
+    unicas, grupos = np.unique(chaves, return_inverse=True)
+    totais = {medida: np.bincount(grupos, weights=matriz[medida][linhas], minlength=len(unicas)).astype(np.int64) for medida in MEDIDAS_OD}
+    return unicas, totais
+
+def _maiores(totais, medida, n):
+    """Posições dos `n` maiores totais da medida, em ordem decrescente (empates pela ordem das chaves)"""
+    return np.lexsort((np.arange(len(totais[medida])), -totais[medida]))[:n]
+
+def obter_principais_destinos(pasta_parquet, aeroporto_origem=None, ano=None, mes=None, n=10, medida="voos"):
+    """
+    Obtém os principais destinos a partir de um aeroporto (ou de todo o país, se None).
+
+    Returns:
+        dict: {'destinos': [{'destino', 'voos', 'passageiros', 'carga'}, ...], 'aeroporto_origem', 'ano', 'mes'},
+        ou None se não houver dados.
+    """
+    if medida not in MEDIDAS_OD: return None
+    ano = _resolver_ano(pasta_parquet, ano)
+    matriz = carregar_matriz_od(pasta_parquet)
+    if matriz is None or ano is None: return None
+    if aeroporto_origem:
+        i = matriz["indice"].get(aeroporto_origem.upper())
+        if i is None: return None
+        linhas = np.arange(matriz["inicio"][i], matriz["inicio"][i + 1])
+    else:
+        linhas = np.arange(len(matriz["origem"]))
+    periodo = matriz["ano"][linhas] == ano
+    if mes: periodo &= matriz["mes"][linhas] == mes
+    linhas = linhas[periodo]
+    if not len(linhas): return None
+
+    destinos, totais = _somar_por_chave(matriz, linhas, matriz["destino"][linhas])
+    return {
+        "destinos": [{"destino": str(matriz["aeroportos"][destinos[j]]), **{m: int(totais[m][j]) for m in MEDIDAS_OD}} for j in _maiores(totais, medida, n)],
+        "aeroporto_origem": aeroporto_origem, "ano": ano, "mes": mes,
+    }
+
+def obter_trafego_entre(pasta_parquet, aeroporto_a, aeroporto_b, ano=None, mes=None):
+    """
+    Obtém o tráfego entre dois aeroportos, em cada sentido e no total.
+
+    Returns:
+        dict: {'ida': {...}, 'volta': {...}, 'total': {...}} com voos, passageiros e carga
+        ('ida' = de aeroporto_a para aeroporto_b), e os filtros; ou None se não houver dados.
+    """
+    ano = _resolver_ano(pasta_parquet, ano)
+    matriz = carregar_matriz_od(pasta_parquet)
+    if matriz is None or ano is None: return None
+    indices = [matriz["indice"].get(aeroporto.upper()) for aeroporto in (aeroporto_a, aeroporto_b)]
+    if None in indices: return None
+
+    sentidos = {}
+    for nome, (i, j) in (("ida", indices), ("volta", indices[::-1])):
+        linhas = np.arange(matriz["inicio"][i], matriz["inicio"][i + 1])
+        filtro = (matriz["destino"][linhas] == j) & (matriz["ano"][linhas] == ano)
+        if mes: filtro &= matriz["mes"][linhas] == mes
+        sentidos[nome] = {medida: int(matriz[medida][linhas[filtro]].sum()) for medida in MEDIDAS_OD}
+    sentidos["total"] = {medida: sentidos["ida"][medida] + sentidos["volta"][medida] for medida in MEDIDAS_OD}
+    if not sentidos["total"]["voos"]: return None
+    return {**sentidos, "aeroporto_a": aeroporto_a, "aeroporto_b": aeroporto_b, "ano": ano, "mes": mes}
+
+def obter_principais_rotas(pasta_parquet, ano=None, mes=None, n=10, medida="voos"):
+    """
+    Obtém as principais rotas do país, somando os dois sentidos de cada par de aeroportos.
+
+    Returns:
+        dict: {'rotas': [{'aeroporto_a', 'aeroporto_b', 'voos', 'passageiros', 'carga'}, ...], 'ano', 'mes'},
+        ou None se não houver dados.
+    """
+    if medida not in MEDIDAS_OD: return None
+    ano = _resolver_ano(pasta_parquet, ano)
+    matriz = carregar_matriz_od(pasta_parquet)
+    if matriz is None or ano is None: return None
+    periodo = matriz["ano"] == ano
+    if mes: periodo &= matriz["mes"] == mes
+    linhas = np.flatnonzero(periodo)
+    if not len(linhas): return None
+
+    # Chave do par sem sentido: menor índice * total de aeroportos + maior índice
+    origem, destino = matriz["origem"][linhas].astype(np.int64), matriz["destino"][linhas].astype(np.int64)
+    total_aeroportos = len(matriz["aeroportos"])
+    pares, totais = _somar_por_chave(matriz, linhas, np.minimum(origem, destino) * total_aeroportos + np.maximum(origem, destino))
+    rotas = []
+    for j in _maiores(totais, medida, n):
+        a, b = divmod(int(pares[j]), total_aeroportos)
+        rotas.append({"aeroporto_a": str(matriz["aeroportos"][a]), "aeroporto_b": str(matriz["aeroportos"][b]), **{m: int(totais[m][j]) for m in MEDIDAS_OD}})
+    return {"rotas": rotas, "ano": ano, "mes": mes}
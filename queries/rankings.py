@@ -1,242 +1,148 @@
 import os
-import duckdb
+from queries.agregados import MEDIDAS_BRUTAS, escolher_fonte
+from queries.matriz_od import obter_principais_destinos
+from queries.statements import executar_preparada, montar_where
+from queries.cache import em_cache
 
-def obter_aeroporto_mais_movimentado(pasta_parquet, ano=None):
-    """Obtém o aeroporto mais movimentado no ano especificado"""
+# Dimensões dos rankings e a coluna correspondente
+DIMENSOES_RANKING = {
+    "aeroporto": "NR_AEROPORTO_REFERENCIA",
+    "operador": "NR_AERONAVE_OPERADOR",
+    "destino": "NR_VOO_OUTRO_AEROPORTO",
+}
+
+# Condições aplicadas sempre que o ranking usa a medida (atrasos: só pousos de operadores regulares)
+CONDICOES_ATRASO = ["NR_MOVIMENTO_TIPO = 'P'", "NR_AERONAVE_OPERADOR != 'GERAL'"]
+CONDICOES_MEDIDA = {
+    "atraso": CONDICOES_ATRASO,
+    "atrasados": CONDICOES_ATRASO,
+    "atraso_maximo": CONDICOES_ATRASO,
+}
+
+@em_cache
+def obter_ranking(pasta_parquet, dimensao, medida, ano=None, mes=None, aeroporto=None, natureza=None, n=10, entidade=None):
+    """
+    Calcula o ranking de uma dimensão por uma medida em uma única consulta.
+
+    Args:
+        dimensao (str): 'aeroporto', 'operador' ou 'destino'.
+        medida (str): 'passageiros', 'carga', 'voos', 'atraso' (minutos de atraso nos pousos),
+            'atrasados' (pousos atrasados) ou 'atraso_maximo' (maior atraso de um pouso, em minutos).
+        ano, mes, aeroporto, natureza: Filtros opcionais (ano None = último ano disponível).
+        n (int): Quantidade de posições retornadas.
+        entidade (str): Se informada, sua posição é retornada mesmo fora do top N.
+
+    Returns:
+        dict: {'ranking': [{'posicao', 'entidade', 'total'}, ...], 'entidade': {...} ou None, e os filtros},
+        ou None se não houver dados.
+    """
     if not os.path.exists(pasta_parquet): return None
+    if dimensao not in DIMENSOES_RANKING or medida not in MEDIDAS_BRUTAS: return None
     if ano is None:
         from utils.helpers import obter_ultimo_ano_disponivel
         ano = obter_ultimo_ano_disponivel(pasta_parquet)
         if ano is None: return None
     
-    con = duckdb.connect(database=':memory:', read_only=False)
-    arquivos_parquet = [os.path.join(pasta_parquet, f) for f in os.listdir(pasta_parquet) if f.endswith('.parquet')]
-    if not arquivos_parquet:
-        con.close()
+    coluna = DIMENSOES_RANKING[dimensao]
+    filtros = [("ANO", ano), ("MES", mes), ("NR_AEROPORTO_REFERENCIA", aeroporto.upper() if aeroporto else None), ("NR_NATUREZA", natureza.upper() if natureza else None)]
+    colunas = [coluna] + [nome for nome, valor in filtros if valor]
+    condicoes = CONDICOES_MEDIDA.get(medida, [])
+    if condicoes:
+        colunas += ["NR_MOVIMENTO_TIPO", "NR_AERONAVE_OPERADOR"]
+    view, medidas = escolher_fonte(pasta_parquet, colunas, [medida])
+    if not view:
         return None
     
+    where_clause, parametros = montar_where(filtros, condicoes_fixas=condicoes)
+    parametros.append(n)
+    qualify_clause = f"QUALIFY Posicao <= ${len(parametros)}"
+    if entidade:
+        parametros.append(entidade.upper())
+        qualify_clause += f" OR Entidade = ${len(parametros)}"
+    
     query = f"""
-    SELECT NR_AEROPORTO_REFERENCIA, SUM(QT_PAX_LOCAL + QT_PAX_CONEXAO_DOMESTICO + QT_PAX_CONEXAO_INTERNACIONAL) AS TotalPassageiros
-    FROM read_parquet({arquivos_parquet}) WHERE ANO = {ano}
-    GROUP BY NR_AEROPORTO_REFERENCIA ORDER BY TotalPassageiros DESC LIMIT 1
+    SELECT
+        {coluna} AS Entidade,
+        {medidas[medida]} AS Total,
+        ROW_NUMBER() OVER (ORDER BY {medidas[medida]} DESC, {coluna}) AS Posicao
+    FROM {view}
+    {where_clause}
+    GROUP BY {coluna}
+    HAVING {medidas[medida]} IS NOT NULL
+    {qualify_clause}
+    ORDER BY Posicao
     """
     try:
-        resultado = con.execute(query).fetchdf()
-        if not resultado.empty:
-            return {"aeroporto": resultado['NR_AEROPORTO_REFERENCIA'].iloc[0], "total_passageiros": int(resultado['TotalPassageiros'].iloc[0]), "ano": ano}
-        return None
+        resultado = executar_preparada(query, parametros).fetchdf()
     except Exception as e:
-        print(f"DEBUG: Erro ao obter aeroporto mais movimentado: {e}")
+        print(f"DEBUG: Erro ao obter ranking de {dimensao} por {medida}: {e}")
+        return None
+    if resultado.empty:
         return None
-    finally:
-        con.close()
+    
+    linhas = [{"posicao": int(linha.Posicao), "entidade": linha.Entidade, "total": int(linha.Total)} for linha in resultado.itertuples(index=False)]
+    posicao_entidade = next((linha for linha in linhas if entidade and linha["entidade"] == entidade.upper()), None)
+    return {
+        "ranking": [linha for linha in linhas if linha["posicao"] <= n],
+        "entidade": posicao_entidade,
+        "dimensao": dimensao, "medida": medida,
+        "ano": ano, "mes": mes, "aeroporto": aeroporto, "natureza": natureza,
+    }
+
+def _lider(ranking):
+    """Retorna a primeira posição do ranking, ou None"""
+    if not ranking or not ranking["ranking"]: return None
+    return ranking["ranking"][0]
+
+def obter_aeroporto_mais_movimentado(pasta_parquet, ano=None):
+    """Obtém o aeroporto mais movimentado no ano especificado"""
+    ranking = obter_ranking(pasta_parquet, "aeroporto", "passageiros", ano=ano, n=1)
+    lider = _lider(ranking)
+    if not lider: return None
+    return {"aeroporto": lider["entidade"], "total_passageiros": lider["total"], "ano": ranking["ano"]}
 
 def obter_aeroporto_mais_voos_internacionais(pasta_parquet, ano=None):
     """Obtém o aeroporto com mais voos internacionais no ano especificado"""
-    if not os.path.exists(pasta_parquet): return None
-    if ano is None:
-        from utils.helpers import obter_ultimo_ano_disponivel
-        ano = obter_ultimo_ano_disponivel(pasta_parquet)
-        if ano is None: return None
-    
-    con = duckdb.connect(database=':memory:', read_only=False)
-    arquivos_parquet = [os.path.join(pasta_parquet, f) for f in os.listdir(pasta_parquet) if f.endswith('.parquet')]
-    if not arquivos_parquet:
-        con.close()
-        return None
-    
-    query = f"""
-    SELECT NR_AEROPORTO_REFERENCIA, COUNT(*) AS TotalVoosInternacionais
-    FROM read_parquet({arquivos_parquet}) WHERE ANO = {ano} AND NR_NATUREZA = 'I'
-    GROUP BY NR_AEROPORTO_REFERENCIA ORDER BY TotalVoosInternacionais DESC LIMIT 1
-    """
-    try:
-        resultado = con.execute(query).fetchdf()
-        if not resultado.empty:
-            return {"aeroporto": resultado['NR_AEROPORTO_REFERENCIA'].iloc[0], "total_voos": int(resultado['TotalVoosInternacionais'].iloc[0]), "ano": ano}
-        return None
-    except Exception as e:
-        print(f"DEBUG: Erro ao obter aeroporto com mais voos internacionais: {e}")
-        return None
-    finally:
-        con.close()
+    ranking = obter_ranking(pasta_parquet, "aeroporto", "voos", ano=ano, natureza="I", n=1)
+    lider = _lider(ranking)
+    if not lider: return None
+    return {"aeroporto": lider["entidade"], "total_voos": lider["total"], "ano": ranking["ano"]}
 
 def obter_operador_mais_passageiros(pasta_parquet, ano=None, aeroporto=None):
     """Obtém o operador que mais transportou passageiros no ano e aeroporto especificados"""
-    if not os.path.exists(pasta_parquet): return None
-    if ano is None:
-        from utils.helpers import obter_ultimo_ano_disponivel
-        ano = obter_ultimo_ano_disponivel(pasta_parquet)
-        if ano is None: return None
-    
-    con = duckdb.connect(database=':memory:', read_only=False)
-    arquivos_parquet = [os.path.join(pasta_parquet, f) for f in os.listdir(pasta_parquet) if f.endswith('.parquet')]
-    if not arquivos_parquet:
-        con.close()
-        return None
-    
-    condicoes = [f"ANO = {ano}"]
-    if aeroporto: condicoes.append(f"NR_AEROPORTO_REFERENCIA = '{aeroporto.upper()}'")
-    where_clause = "WHERE " + " AND ".join(condicoes) if condicoes else ""
-    
-    query = f"""
-    SELECT NR_AERONAVE_OPERADOR, SUM(QT_PAX_LOCAL + QT_PAX_CONEXAO_DOMESTICO + QT_PAX_CONEXAO_INTERNACIONAL) AS TotalPassageirosOperador
-    FROM read_parquet({arquivos_parquet}) {where_clause}
-    GROUP BY NR_AERONAVE_OPERADOR ORDER BY TotalPassageirosOperador DESC LIMIT 1
-    """
-    try:
-        resultado = con.execute(query).fetchdf()
-        if not resultado.empty:
-            return {"operador": resultado['NR_AERONAVE_OPERADOR'].iloc[0], "total_passageiros": int(resultado['TotalPassageirosOperador'].iloc[0]), "ano": ano, "aeroporto": aeroporto}
-        return None
-    except Exception as e:
-        print(f"DEBUG: Erro ao obter operador com mais passageiros: {e}")
-        return None
-    finally:
-        con.close()
+    ranking = obter_ranking(pasta_parquet, "operador", "passageiros", ano=ano, aeroporto=aeroporto, n=1)
+    lider = _lider(ranking)
+    if not lider: return None
+    return {"operador": lider["entidade"], "total_passageiros": lider["total"], "ano": ranking["ano"], "aeroporto": aeroporto}
 
 def obter_operador_mais_cargas(pasta_parquet, ano=None, aeroporto=None):
     """Obtém o operador que mais transportou cargas no ano e aeroporto especificados"""
-    if not os.path.exists(pasta_parquet): return None
-    if ano is None:
-        from utils.helpers import obter_ultimo_ano_disponivel
-        ano = obter_ultimo_ano_disponivel(pasta_parquet)
-        if ano is None: return None
-    
-    con = duckdb.connect(database=':memory:', read_only=False)
-    arquivos_parquet = [os.path.join(pasta_parquet, f) for f in os.listdir(pasta_parquet) if f.endswith('.parquet')]
-    if not arquivos_parquet:
-        con.close()
-        return None
-    
-    condicoes = [f"ANO = {ano}"]
-    if aeroporto: condicoes.append(f"NR_AEROPORTO_REFERENCIA = '{aeroporto.upper()}'")
-    where_clause = "WHERE " + " AND ".join(condicoes) if condicoes else ""
-    
-    query = f"""
-    SELECT NR_AERONAVE_OPERADOR, SUM(QT_CARGA) AS TotalCargasOperador
-    FROM read_parquet({arquivos_parquet}) {where_clause}
-    GROUP BY NR_AERONAVE_OPERADOR ORDER BY TotalCargasOperador DESC LIMIT 1
-    """
-    try:
-        resultado = con.execute(query).fetchdf()
-        if not resultado.empty:
-            return {"operador": resultado['NR_AERONAVE_OPERADOR'].iloc[0], "total_cargas": int(resultado['TotalCargasOperador'].iloc[0]), "ano": ano, "aeroporto": aeroporto}
-        return None
-    except Exception as e:
-        print(f"DEBUG: Erro ao obter operador com mais cargas: {e}")
-        return None
-    finally:
-        con.close()
+    ranking = obter_ranking(pasta_parquet, "operador", "carga", ano=ano, aeroporto=aeroporto, n=1)
+    lider = _lider(ranking)
+    if not lider: return None
+    return {"operador": lider["entidade"], "total_cargas": lider["total"], "ano": ranking["ano"], "aeroporto": aeroporto}
 
 def obter_principal_destino(pasta_parquet, aeroporto_origem=None, ano=None):
-    """Obtém o principal destino a partir do aeroporto de origem no ano especificado"""
-    if not os.path.exists(pasta_parquet): return None
-    if ano is None:
-        from utils.helpers import obter_ultimo_ano_disponivel
-        ano = obter_ultimo_ano_disponivel(pasta_parquet)
-        if ano is None: return None
-    
-    con = duckdb.connect(database=':memory:', read_only=False)
-    arquivos_parquet = [os.path.join(pasta_parquet, f) for f in os.listdir(pasta_parquet) if f.endswith('.parquet')]
-    if not arquivos_parquet:
-        con.close()
-        return None
-    
-    condicoes = [f"ANO = {ano}"]
-    if aeroporto_origem: condicoes.append(f"NR_AEROPORTO_REFERENCIA = '{aeroporto_origem.upper()}'")
-    where_clause = "WHERE " + " AND ".join(condicoes) if condicoes else ""
-    
-    query = f"""
-    SELECT NR_VOO_OUTRO_AEROPORTO, COUNT(*) AS TotalVoos
-    FROM read_parquet({arquivos_parquet}) {where_clause}
-    GROUP BY NR_VOO_OUTRO_AEROPORTO ORDER BY TotalVoos DESC LIMIT 1
-    """
-    try:
-        resultado = con.execute(query).fetchdf()
-        if not resultado.empty:
-            return {"destino_icao": resultado['NR_VOO_OUTRO_AEROPORTO'].iloc[0], "total_voos": int(resultado['TotalVoos'].iloc[0]), "ano": ano, "aeroporto_origem": aeroporto_origem}
-        return None
-    except Exception as e:
-        print(f"DEBUG: Erro ao obter principal destino: {e}")
-        return None
-    finally:
-        con.close()
+    """Obtém o principal destino (em voos, pela matriz OD) a partir do aeroporto de origem no ano especificado"""
+    resultado = obter_principais_destinos(pasta_parquet, aeroporto_origem, ano=ano, n=1)
+    if not resultado or not resultado["destinos"]: return None
+    lider = resultado["destinos"][0]
+    return {"destino_icao": lider["destino"], "total_voos": lider["voos"], "ano": resultado["ano"], "aeroporto_origem": aeroporto_origem}
 
 def obter_operador_maiores_atrasos(pasta_parquet, ano=None, aeroporto=None):
     """Obtém o operador com maiores atrasos no ano e aeroporto especificados"""
-    if not os.path.exists(pasta_parquet): return None
-    if ano is None:
-        from utils.helpers import obter_ultimo_ano_disponivel
-        ano = obter_ultimo_ano_disponivel(pasta_parquet)
-        if ano is None: return None
-    
-    con = duckdb.connect(database=':memory:', read_only=False)
-    arquivos_parquet = [os.path.join(pasta_parquet, f) for f in os.listdir(pasta_parquet) if f.endswith('.parquet')]
-    if not arquivos_parquet:
-        con.close()
-        return None
-    
-    condicoes = [f"ANO = {ano}", "NR_MOVIMENTO_TIPO = 'P'", "NR_AERONAVE_OPERADOR != 'GERAL'"]
-    if aeroporto: condicoes.append(f"NR_AEROPORTO_REFERENCIA = '{aeroporto.upper()}'")
-    where_clause = "WHERE " + " AND ".join(condicoes) if condicoes else ""
-    
-    query = f"""
-    WITH AtrasosCalculados AS (
-        SELECT
-            NR_AERONAVE_OPERADOR,
-            (HH_CALCO.TotalMinutes - HH_PREVISTO.TotalMinutes) AS MinutosAtrasoBrutos
-        FROM read_parquet({arquivos_parquet})
-        {where_clause}
-    )
-    SELECT
-        NR_AERONAVE_OPERADOR,
-        SUM(CASE WHEN MinutosAtrasoBrutos > 0 THEN MinutosAtrasoBrutos ELSE 0 END) AS TotalMinutosAtraso
-    FROM AtrasosCalculados
-    GROUP BY NR_AERONAVE_OPERADOR
-    ORDER BY TotalMinutosAtraso DESC
-    LIMIT 1
-    """
-    try:
-        resultado = con.execute(query).fetchdf()
-        if not resultado.empty:
-            return {"operador": resultado['NR_AERONAVE_OPERADOR'].iloc[0], "total_minutos_atraso": int(resultado['TotalMinutosAtraso'].iloc[0]), "ano": ano, "aeroporto": aeroporto}
-        return None
-    except Exception as e:
-        print(f"DEBUG: Erro ao obter operador com maiores atrasos: {e}")
-        return None
-    finally:
-        con.close()
+    ranking = obter_ranking(pasta_parquet, "operador", "atraso", ano=ano, aeroporto=aeroporto, n=1)
+    lider = _lider(ranking)
+    if not lider: return None
+    return {"operador": lider["entidade"], "total_minutos_atraso": lider["total"], "ano": ranking["ano"], "aeroporto": aeroporto}
 
 def obter_top_10_aeroportos(pasta_parquet, ano):
     """Obtém os 10 aeroportos mais movimentados no ano especificado"""
-    if not os.path.exists(pasta_parquet): return []
-    con = duckdb.connect(database=':memory:', read_only=False)
-    arquivos_parquet = [os.path.join(pasta_parquet, f) for f in os.listdir(pasta_parquet) if f.endswith('.parquet')]
-    if not arquivos_parquet:
-        con.close()
-        return []
-    
-    query = f"""
-    SELECT
-        NR_AEROPORTO_REFERENCIA
-    FROM read_parquet({arquivos_parquet})
-    WHERE ANO = {ano}
-    GROUP BY NR_AEROPORTO_REFERENCIA
-    ORDER BY SUM(QT_PAX_LOCAL + QT_PAX_CONEXAO_DOMESTICO + QT_PAX_CONEXAO_INTERNACIONAL) DESC
-    LIMIT 10
-    """
-    try:
-        resultado = con.execute(query).fetchdf()
-        if not resultado.empty:
-            return resultado['NR_AEROPORTO_REFERENCIA'].tolist()
-        return []
-    except Exception as e:
-        print(f"DEBUG: Erro ao obter top 10 aeroportos: {e}")
-        return []
-    finally:
-        con.close()
+    ranking = obter_ranking(pasta_parquet, "aeroporto", "passageiros", ano=ano, n=10)
+    if not ranking: return []
+    return [linha["entidade"] for linha in ranking["ranking"]]
 
+@em_cache
 def calcular_market_share(pasta_parquet, ano=None, mes=None, aeroporto=None):
     """Calcula o market share dos operadores no período e aeroporto especificados"""
     if not os.path.exists(pasta_parquet): return None
@@ -245,24 +151,19 @@ def calcular_market_share(pasta_parquet, ano=None, mes=None, aeroporto=None):
         ano = obter_ultimo_ano_disponivel(pasta_parquet)
         if ano is None: return None
     
-    con = duckdb.connect(database=':memory:', read_only=False)
-    arquivos_parquet = [os.path.join(pasta_parquet, f) for f in os.listdir(pasta_parquet) if f.endswith('.parquet')]
-    if not arquivos_parquet:
-        con.close()
+    view, medidas = escolher_fonte(pasta_parquet, ["ANO", "MES", "NR_AEROPORTO_REFERENCIA", "NR_AERONAVE_OPERADOR"], ["voos", "passageiros"])
+    if not view:
         return None
     
-    condicoes = [f"ANO = {ano}"]
-    if mes: condicoes.append(f"MES = {mes}")
-    if aeroporto: condicoes.append(f"NR_AEROPORTO_REFERENCIA = '{aeroporto.upper()}'")
-    where_clause = "WHERE " + " AND ".join(condicoes)
+    where_clause, parametros = montar_where([("ANO", ano), ("MES", mes), ("NR_AEROPORTO_REFERENCIA", aeroporto.upper() if aeroporto else None)])
     
     query = f"""
     WITH OperatorStats AS (
         SELECT
             NR_AERONAVE_OPERADOR,
-            COUNT(*) AS TotalVoos,
-            SUM(QT_PAX_LOCAL + QT_PAX_CONEXAO_DOMESTICO + QT_PAX_CONEXAO_INTERNACIONAL) AS TotalPassageiros
-        FROM read_parquet({arquivos_parquet})
+            {medidas['voos']} AS TotalVoos,
+            {medidas['passageiros']} AS TotalPassageiros
+        FROM {view}
         {where_clause}
         GROUP BY NR_AERONAVE_OPERADOR
     ),
@@ -281,7 +182,7 @@ def calcular_market_share(pasta_parquet, ano=None, mes=None, aeroporto=None):
     ORDER BY PaxShare DESC
     """
     try:
-        resultado = con.execute(query).fetchdf()
+        resultado = executar_preparada(query, parametros).fetchdf()
         if not resultado.empty:
             threshold = 1.0
             maiores_operadores_df = resultado[resultado['PaxShare'] >= threshold]
@@ -300,6 +201,80 @@ def calcular_market_share(pasta_parquet, ano=None, mes=None, aeroporto=None):
         return None
     except Exception as e:
         print(f"DEBUG: Erro ao calcular market share: {e}")
+        return None 
+@em_cache
+def obter_resumo_ano(pasta_parquet, ano=None, aeroporto=None, n=10):
+    """
+    Calcula, em uma única leitura do ano (do rollup, se existir), os principais destaques exibidos pelas páginas e pelo chatbot.
+
+    Os rankings de aeroportos (mais movimentado, mais voos internacionais e top N) são sempre
+    nacionais; os de operadores, destino e atrasos consideram o `aeroporto`, se informado.
+    Cada item tem o mesmo formato do retorno da função individual equivalente
+    (ex.: 'operador_mais_passageiros' ↔ obter_operador_mais_passageiros).
+    """
+    if not os.path.exists(pasta_parquet): return None
+    if ano is None:
+        from utils.helpers import obter_ultimo_ano_disponivel
+        ano = obter_ultimo_ano_disponivel(pasta_parquet)
+        if ano is None: return None
+    
+    # Passageiros, voos e carga vêm do rollup quando ele existe; os dados brutos só são lidos sem ele
+    view, medidas = escolher_fonte(pasta_parquet, ["ANO", "NR_AEROPORTO_REFERENCIA", "NR_AERONAVE_OPERADOR", "NR_NATUREZA"], ["passageiros", "voos", "carga"])
+    if not view:
+        return None
+    
+    parametros = [ano]
+    filtro_local = "TRUE"
+    if aeroporto:
+        parametros.append(aeroporto.upper())
+        filtro_local = "NR_AEROPORTO_REFERENCIA = $2"
+    
+    # GROUPING SETS agrupa a mesma leitura por aeroporto e por operador; os FILTER
+    # restringem cada medida às linhas que a função individual correspondente consideraria
+    query = f"""
+    SELECT
+        GROUPING(NR_AEROPORTO_REFERENCIA, NR_AERONAVE_OPERADOR) AS Grupo,
+        NR_AEROPORTO_REFERENCIA,
+        NR_AERONAVE_OPERADOR,
+        {medidas['passageiros']} AS TotalPassageiros,
+        {medidas['voos']} FILTER (WHERE NR_NATUREZA = 'I') AS TotalVoosInternacionais,
+        {medidas['passageiros']} FILTER (WHERE {filtro_local}) AS TotalPassageirosLocal,
+        {medidas['carga']} FILTER (WHERE {filtro_local}) AS TotalCargasLocal
+    FROM {view}
+    WHERE ANO = $1
+    GROUP BY GROUPING SETS ((NR_AEROPORTO_REFERENCIA), (NR_AERONAVE_OPERADOR))
+    """
+    try:
+        resultado = executar_preparada(query, parametros).fetchdf()
+        if resultado.empty:
+            return None
+    except Exception as e:
+        print(f"DEBUG: Erro ao obter resumo do ano: {e}")
         return None
-    finally:
-        con.close() 
\ No newline at end of file
+    
+    # Grupo indica, em bits, as colunas agregadas (0b01 = agrupado só por aeroporto, 0b10 = só por operador)
+    por_aeroporto = resultado[resultado['Grupo'] == 0b01]
+    por_operador = resultado[resultado['Grupo'] == 0b10]
+    
+    def ordenar(df, coluna, chave):
+        # Mesmo desempate de obter_ranking: maior total e, entre empatados, o menor código
+        return df.dropna(subset=[coluna]).sort_values([coluna, chave], ascending=[False, True])
+    
+    def maior(df, coluna, chave):
+        df = ordenar(df, coluna, chave)
+        if df.empty or (coluna.startswith('TotalVoos') and df[coluna].iloc[0] == 0): return None
+        return df.iloc[0]
+    
+    resumo = {"ano": ano, "aeroporto": aeroporto}
+    linha = maior(por_aeroporto, 'TotalPassageiros', 'NR_AEROPORTO_REFERENCIA')
+    resumo["aeroporto_mais_movimentado"] = {"aeroporto": linha['NR_AEROPORTO_REFERENCIA'], "total_passageiros": int(linha['TotalPassageiros']), "ano": ano} if linha is not None else None
+    linha = maior(por_aeroporto, 'TotalVoosInternacionais', 'NR_AEROPORTO_REFERENCIA')
+    resumo["aeroporto_mais_voos_internacionais"] = {"aeroporto": linha['NR_AEROPORTO_REFERENCIA'], "total_voos": int(linha['TotalVoosInternacionais']), "ano": ano} if linha is not None else None
+    linha = maior(por_operador, 'TotalPassageirosLocal', 'NR_AERONAVE_OPERADOR')
+    resumo["operador_mais_passageiros"] = {"operador": linha['NR_AERONAVE_OPERADOR'], "total_passageiros": int(linha['TotalPassageirosLocal']), "ano": ano, "aeroporto": aeroporto} if linha is not None else None
+    linha = maior(por_operador, 'TotalCargasLocal', 'NR_AERONAVE_OPERADOR')
+    resumo["operador_mais_cargas"] = {"operador": linha['NR_AERONAVE_OPERADOR'], "total_cargas": int(linha['TotalCargasLocal']), "ano": ano, "aeroporto": aeroporto} if linha is not None else None
+    resumo["principal_destino"] = obter_principal_destino(pasta_parquet, aeroporto, ano) # Pela matriz OD, sem ler os dados
+    resumo["operador_maiores_atrasos"] = obter_operador_maiores_atrasos(pasta_parquet, ano, aeroporto) # Pela tabela de atrasos, se existir
+    resumo["top_aeroportos"] = ordenar(por_aeroporto, 'TotalPassageiros', 'NR_AEROPORTO_REFERENCIA').head(n)['NR_AEROPORTO_REFERENCIA'].tolist()
+    return resumo
@@ -0,0 +1,54 @@
+import hashlib
+import numbers
+import threading
+from queries.connection import obter_conexao
+
+_local = threading.local()
+
+def literal_sql(valor):
+    """Converte um valor Python em literal SQL tipado, escapando aspas em textos"""
+    if valor is None: return "NULL"
+    if isinstance(valor, bool): return "TRUE" if valor else "FALSE"
+    if isinstance(valor, numbers.Integral): return str(int(valor))
+    if isinstance(valor, numbers.Real): return repr(float(valor))
+    return "'" + str(valor).replace("'", "''") + "'"
+
+def _preparadas_da_conexao(con):
+    """Retorna o registro de instruções já preparadas no cursor da thread atual"""
+    registro = getattr(_local, "registro", None)
+    if registro is None or registro["conexao"] is not con:
+        registro = {"conexao": con, "nomes": {}}
+        _local.registro = registro
+    return registro["nomes"]
+
+def montar_where(filtros, condicoes_fixas=(), parametros=None):
+    """Monta a cláusula WHERE com parâmetros posicionais ($1, $2...) para os filtros informados.
+
+    `filtros` é uma sequência de pares (coluna, valor); pares com valor vazio são ignorados.
+    Retorna a cláusula e a lista de parâmetros (estendendo `parametros`, se fornecida).
+    """
+    parametros = [] if parametros is None else parametros
+    condicoes = list(condicoes_fixas)
+    for coluna, valor in filtros:
+        if not valor: continue
+        parametros.append(valor)
+        condicoes.append(f"{coluna} = ${len(parametros)}")
+    where_clause = "WHERE " + " AND ".join(condicoes) if condicoes else ""
+    return where_clause, parametros
+
+def executar_preparada(sql, parametros=()):
+    """Executa `sql` como instrução preparada no cursor da thread atual.
+
+    Cada formato de consulta (texto SQL com marcadores $1, $2...) é preparado uma única vez
+    por conexão e reutilizado com os novos parâmetros, evitando novo parse e planejamento.
+    Os valores nunca são interpolados no SQL da consulta, apenas como literais tipados.
+    """
+    con = obter_conexao()
+    preparadas = _preparadas_da_conexao(con)
+    nome = preparadas.get(sql)
+    if nome is None:
+        nome = "consulta_" + hashlib.sha1(sql.encode("utf-8")).hexdigest()[:16]
+        con.execute(f"PREPARE {nome} AS {sql}")
+        preparadas[sql] = nome
+    argumentos = ", ".join(literal_sql(valor) for valor in parametros)
+    return con.execute(f"EXECUTE {nome}({argumentos})" if parametros else f"EXECUTE {nome}")
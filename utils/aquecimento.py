@@ -0,0 +1,69 @@
+import os
+import threading
+import time
+import streamlit as st
+from queries import database, rankings
+from queries.catalog import obter_impressao_dataset
+from utils.cache_streamlit import MAX_VERSOES_RECURSOS
+
+# --- Documentação do Código ---
+# Aquecimento do cache compartilhado (queries.cache): logo que o app sobe (ou que o dataset muda),
+# uma thread em segundo plano executa as consultas das páginas inicial, de insights, de tendências
+# e do chat, para que o primeiro visitante já as encontre prontas. A renderização nunca espera por ela.
+
+# Desliga o aquecimento com AQUECIMENTO_CACHE=0 (por exemplo, em desenvolvimento)
+AQUECIMENTO_CACHE = os.environ.get("AQUECIMENTO_CACHE", "1") != "0"
+
+def consultas_aquecimento(ultimo_ano):
+    """Consultas feitas pelas páginas ao abrir, com os mesmos argumentos que elas usam"""
+    return [
+        ("resumo do ano", rankings.obter_resumo_ano, {"ano": ultimo_ano}),
+        ("top 10 aeroportos", rankings.obter_top_10_aeroportos, {"ano": ultimo_ano}),
+        ("market share", rankings.calcular_market_share, {"ano": ultimo_ano}),
+        ("histórico de passageiros", database.obter_historico_movimentacao, {"tipo_consulta": "passageiros"}),
+        ("histórico de carga", database.obter_historico_movimentacao, {"tipo_consulta": "carga"}),
+        ("histórico de cargas (chat)", database.obter_historico_movimentacao, {"tipo_consulta": "cargas"}),
+        ("aeroporto mais movimentado", rankings.obter_aeroporto_mais_movimentado, {"ano": ultimo_ano}),
+        ("aeroporto mais movimentado (ano anterior)", rankings.obter_aeroporto_mais_movimentado, {"ano": ultimo_ano - 1}),
+        ("aeroporto com mais voos internacionais", rankings.obter_aeroporto_mais_voos_internacionais, {"ano": ultimo_ano}),
+        ("operador com mais passageiros", rankings.obter_operador_mais_passageiros, {"ano": ultimo_ano}),
+        ("operador com mais cargas", rankings.obter_operador_mais_cargas, {"ano": ultimo_ano}),
+        ("operador com maiores atrasos", rankings.obter_operador_maiores_atrasos, {"ano": ultimo_ano}),
+        ("principal destino (matriz OD)", rankings.obter_principal_destino, {"ano": ultimo_ano}),
+    ]
+
+def aquecer_cache(pasta_parquet, ultimo_ano):
+    """Executa as consultas de aquecimento em sequência, registrando o progresso e o tempo de cada uma"""
+    consultas = consultas_aquecimento(ultimo_ano)
+    inicio = time.perf_counter()
+    print(f"DEBUG: Aquecimento do cache iniciado ({len(consultas)} consultas, ano {ultimo_ano}).")
+    for i, (nome, funcao, argumentos) in enumerate(consultas, 1):
+        inicio_consulta = time.perf_counter()
+        try:
+            funcao(pasta_parquet, **argumentos)
+        except Exception as e:
+            print(f"DEBUG: Erro ao aquecer o cache ({nome}): {e}")
+            continue
+        print(f"DEBUG: Aquecimento do cache {i}/{len(consultas)}: {nome} em {time.perf_counter() - inicio_consulta:.2f}s")
+    print(f"DEBUG: Aquecimento do cache concluído em {time.perf_counter() - inicio:.2f}s.")
+
+@st.cache_resource(max_entries=MAX_VERSOES_RECURSOS, show_spinner=False)
+def _iniciar_thread(pasta_parquet, impressao, ultimo_ano):
+    """Inicia a thread de aquecimento; o st.cache_resource garante uma única por versão do dataset"""
+    # daemon=False explícito: a thread do script do Streamlit é daemon e seria herdado; encerrar o
+    # processo com o aquecimento no meio de uma consulta DuckDB aborta o interpretador
+    thread = threading.Thread(target=aquecer_cache, args=(pasta_parquet, ultimo_ano), name="aquecimento_cache", daemon=False)
+    thread.start()
+    return thread
+
+def iniciar_aquecimento(pasta_parquet, ultimo_ano):
+    """Inicia o aquecimento do cache em segundo plano, uma vez por versão do dataset, sem bloquear a chamada.
+
+    Returns:
+        threading.Thread: A thread de aquecimento (já iniciada ou concluída), ou None se desligado ou sem dados.
+    """
+    if not AQUECIMENTO_CACHE or ultimo_ano is None: return None
+    pasta_parquet = os.path.abspath(pasta_parquet)
+    impressao = obter_impressao_dataset(pasta_parquet) if os.path.exists(pasta_parquet) else None
+    if impressao is None: return None
+    return _iniciar_thread(pasta_parquet, impressao, ultimo_ano)
@@ -0,0 +1,70 @@
+import base64
+import hashlib
+import mimetypes
+import os
+import threading
+
+# --- Documentação do Código ---
+# Registro dos arquivos estáticos da interface (ícones das páginas, CSS). Cada arquivo é lido,
+# codificado e identificado por um hash uma única vez por processo e depois servido da memória;
+# só volta a ser lido se o tamanho ou a data de modificação mudarem.
+
+APP_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Folha de estilo global do app
+CSS_APP_PATH = os.path.join(APP_DIR, "styles", "app.css")
+
+_ativos = {}
+_lock_ativos = threading.Lock()
+
+def carregar_ativo(caminho):
+    """
+    Retorna o registro de um arquivo estático, lendo-o só na primeira chamada ou se ele mudar.
+
+    Returns:
+        dict: {'conteudo' (bytes), 'mime', 'impressao' (hash curto do conteúdo), 'data_uri'},
+        ou None se o arquivo não existir.
+    """
+    if not caminho: return None
+    caminho = os.path.abspath(caminho)
+    try:
+        estado = os.stat(caminho)
+    except OSError:
+        return None
+    versao = (estado.st_size, estado.st_mtime_ns)
+    ativo = _ativos.get(caminho)
+    if ativo and ativo["versao"] == versao:
+        return ativo
+    with _lock_ativos:
+        ativo = _ativos.get(caminho)
+        if ativo and ativo["versao"] == versao:
+            return ativo
+        try:
+            with open(caminho, "rb") as f:
+                conteudo = f.read()
+        except OSError as e:
+            print(f"DEBUG: Erro ao carregar o arquivo estático '{caminho}': {e}")
+            return None
+        mime = mimetypes.guess_type(caminho)[0] or "application/octet-stream"
+        ativo = {
+            "versao": versao,
+            "conteudo": conteudo,
+            "mime": mime,
+            "impressao": hashlib.sha256(conteudo).hexdigest()[:12],
+            "data_uri": f"data:{mime};base64,{base64.b64encode(conteudo).decode()}",
+        }
+        _ativos[caminho] = ativo
+        return ativo
+
+def src_imagem(caminho):
+    """Valor do atributo src de uma imagem em HTML (data URI montado uma única vez), ou None se ela não existir"""
+    ativo = carregar_ativo(caminho)
+    return ativo["data_uri"] if ativo else None
+
+def estilo_css(caminho=CSS_APP_PATH):
+    """Bloco <style> com o conteúdo do arquivo CSS, montado uma única vez; vazio se o arquivo não existir"""
+    ativo = carregar_ativo(caminho)
+    if not ativo: return ""
+    if "html" not in ativo:
+        ativo["html"] = f"<style>\n{ativo['conteudo'].decode('utf-8')}\n</style>"
+    return ativo["html"]
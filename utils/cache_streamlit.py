@@ -0,0 +1,35 @@
+import os
+import streamlit as st
+from queries.cache import limpar_cache
+from queries.catalog import obter_impressao_dataset, obter_view
+from queries.connection import obter_banco
+from queries.manifest import carregar_manifesto
+
+# --- Documentação do Código ---
+# Recursos compartilhados entre todas as sessões do Streamlit: o banco DuckDB, a view do dataset e o
+# manifesto ficam em st.cache_resource, uma vez por versão do dataset. Os resultados das consultas
+# não passam por aqui: o cache do processo (queries.cache.em_cache) já os compartilha entre as
+# sessões, com a impressão digital do dataset na chave, TTL e limite de entradas por consulta.
+
+# Versões do dataset mantidas em st.cache_resource (a atual e a anterior, durante uma troca)
+MAX_VERSOES_RECURSOS = 2
+
+@st.cache_resource(max_entries=MAX_VERSOES_RECURSOS, show_spinner=False)
+def _preparar_recursos(pasta_parquet, impressao):
+    """Abre o banco, cria a view e carrega o manifesto de uma versão do dataset"""
+    banco = obter_banco()
+    view = obter_view(pasta_parquet)
+    manifesto = carregar_manifesto(pasta_parquet)
+    return {"banco": banco, "view": view, "manifesto": manifesto, "impressao": impressao}
+
+def obter_recursos_dataset(pasta_parquet):
+    """Retorna os recursos compartilhados (banco, view e manifesto) da versão atual do dataset, ou None se não houver dados"""
+    pasta_parquet = os.path.abspath(pasta_parquet)
+    impressao = obter_impressao_dataset(pasta_parquet) if os.path.exists(pasta_parquet) else None
+    if impressao is None: return None
+    return _preparar_recursos(pasta_parquet, impressao)
+
+def limpar_cache_streamlit():
+    """Remove os recursos guardados pelo Streamlit e os resultados do cache de consultas"""
+    st.cache_resource.clear()
+    limpar_cache()
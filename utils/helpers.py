@@ -1,20 +1,16 @@
 import os
-import duckdb
+from queries.manifest import obter_anos_disponiveis
 
 def formatar_numero_br(valor):
     """Formata um número para o padrão brasileiro de separadores"""
     return f"{int(valor):,}".replace(",", "X").replace(".", ",").replace("X", ".")
 
 def obter_ultimo_ano_disponivel(pasta_parquet):
-    """Obtém o último ano disponível nos arquivos parquet"""
+    """Obtém o último ano disponível nos arquivos parquet (pelo manifesto, sem ler os dados)"""
     if not os.path.exists(pasta_parquet): return None
-    arquivos_parquet = [os.path.join(pasta_parquet, f) for f in os.listdir(pasta_parquet) if f.endswith('.parquet')]
-    if not arquivos_parquet: return None
-    con = duckdb.connect(database=':memory:', read_only=False)
     try:
-        return con.execute(f"SELECT MAX(ANO) FROM read_parquet({arquivos_parquet})").fetchone()[0]
+        anos = obter_anos_disponiveis(pasta_parquet)
+        return anos[-1] if anos else None
     except Exception as e:
         print(f"DEBUG: Erro ao obter o último ano disponível: {e}")
         return None
-    finally:
-        con.close() 
\ No newline at end of file